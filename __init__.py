@@ -1,3 +1,10 @@
-from .easyeda_lib_loader import EasyEDALibLoaderPlugin
+import sys
 
-EasyEDALibLoaderPlugin().register()
\ No newline at end of file
+# STEP model conversion workers import this package too, they must not register the plugin.
+# Workers have multiprocessing loaded already; importing it here would slow down KiCad startup.
+multiprocessing = sys.modules.get("multiprocessing")
+
+if multiprocessing is None or multiprocessing.parent_process() is None:
+    from .easyeda_lib_loader import EasyEDALibLoaderPlugin
+
+    EasyEDALibLoaderPlugin().register()
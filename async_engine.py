@@ -0,0 +1,140 @@
+import asyncio
+import concurrent.futures
+
+from logging import info, warning, debug, error
+
+from .component_loader import ComponentLoader, getUuidFirstPart, dataStrText, WORKER_THREAD_NAME
+
+DEFAULT_CONCURRENCY = 16
+
+
+class AsyncDownloadEngine:
+    """Downloads parts with asyncio, streaming each device through
+    device -> components -> dataStr -> STEP download as soon as its inputs arrive.
+
+    There are no barriers between stages, so a slow device only delays its own
+    components and model. Blocking HTTP calls of the ComponentLoader run in a
+    thread pool, and a single semaphore limits all of them together.
+    """
+
+    def __init__(self, loader: ComponentLoader, concurrency=None):
+        self.loader = loader
+        self.concurrency = concurrency or DEFAULT_CONCURRENCY
+
+    def run(self, components):
+        """Returns the library device file, like ComponentLoader.downloadSymFp"""
+        return asyncio.run(self.main(components))
+
+    async def call(self, fn, *args):
+        async with self.semaphore:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def main(self, components):
+        loader = self.loader
+
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.devices = {}
+        self.components = {"symbol": {}, "footprint": {}, "model": {}}
+        self.dataStr = {}
+        self.componentTasks = {}
+        self.modelTasks = {}
+
+        loader.resetModelStats()
+
+        info(f"Fetching info...")
+
+        code_components, direct_uuids = loader.splitComponents(components)
+        cachedUuids, batches = loader.planCodeSearch(code_components)
+
+        with concurrent.futures.ThreadPoolExecutor(self.concurrency, thread_name_prefix=WORKER_THREAD_NAME) as self.executor:
+            with loader.createFixupExecutor() as self.fixupExecutor:
+                tasks = [asyncio.create_task(self.device(dev_uuid)) for dev_uuid in direct_uuids + cachedUuids]
+                tasks += [asyncio.create_task(self.codeBatch(batch)) for batch in batches]
+
+                await asyncio.gather(*tasks)
+
+                libDeviceFile = loader.writeLibrary(self.devices, self.components["symbol"], self.components["footprint"],
+                                                    self.components["model"], self.dataStr)
+
+                info( "*****************************" )
+                info(f"Waiting for 3D models...")
+
+        loader.printModelSummary(len(self.modelTasks))
+        return libDeviceFile
+
+    async def codeBatch(self, batch):
+        try:
+            uuids = await self.call(self.loader.searchBatch, batch)
+        except Exception as e:
+            error(f"Failed to search parts {', '.join(batch)}: {e}")
+
+            for code in batch:
+                self.loader.result.part(code).fail("search", e)
+            return
+
+        await asyncio.gather(*[self.device(dev_uuid) for dev_uuid in uuids])
+
+    async def device(self, dev_uuid):
+        try:
+            device = await self.call(self.loader.fetchDevice, dev_uuid)
+        except Exception as e:
+            error(f"Failed to fetch device {dev_uuid}: {e}")
+            return
+
+        if device["uuid"] in self.devices:
+            return
+
+        self.devices[device["uuid"]] = device
+        attributes = device["attributes"]
+
+        await asyncio.gather(
+            self.component("symbol", attributes.get("Symbol")),
+            self.component("footprint", attributes.get("Footprint")),
+            self.component("model", getUuidFirstPart(attributes.get("3D Model")))
+        )
+
+        if getUuidFirstPart(attributes.get("3D Model")) in self.components["model"]:
+            await self.model(device)
+
+    # Fetch a component and resolve its dataStr, once per UUID
+    async def component(self, kind, uuid):
+        if not uuid:
+            return
+
+        task = self.componentTasks.get(uuid)
+
+        if task is None:
+            task = asyncio.create_task(self.fetchComponent(kind, uuid))
+            self.componentTasks[uuid] = task
+
+        await task
+
+    async def fetchComponent(self, kind, uuid):
+        try:
+            compData = await self.call(self.loader.fetchComponent, uuid)
+        except Exception as e:
+            error(f"Failed to fetch component for uuid {uuid}: {e}")
+            return
+
+        self.dataStr[uuid] = await self.call(self.loader.resolveDataStr, compData)
+
+        if kind == "model" and self.dataStr[uuid]:
+            compData["dataStr"] = dataStrText(self.dataStr[uuid])
+
+        self.components[kind][uuid] = compData
+
+    async def model(self, device):
+        model = self.loader.planModel(device, self.components["model"])
+
+        if not model:
+            return
+
+        if model.directUuid in self.modelTasks:
+            self.loader.addModelDevice(self.modelTasks[model.directUuid], device["uuid"])
+            return
+
+        self.modelTasks[model.directUuid] = model
+        self.loader.modelStats.addTotal()
+
+        if await self.call(self.loader.downloadModel, model):
+            self.loader.submitFixup(self.fixupExecutor, model)
@@ -0,0 +1,130 @@
+"""Synthetic EasyEDA API data for the mock server.
+
+Part Cn has device d<n>, symbol s<n> and a footprint and 3D model shared with
+the other parts in its group of --share parts. All UUIDs are 32 characters,
+with a letter prefix that tells the entity type.
+"""
+import re
+import gzip
+import json
+
+from Crypto.Cipher import AES
+
+# dataStrId blobs are encrypted with a fixed key, like every blob of a real component has its own
+KEY_HEX = "000102030405060708090a0b0c0d0e0f"
+IV_HEX = "101112131415161718191a1b"
+
+CODE_RE = re.compile(r"^C(\d+)$")
+
+
+def partNumber(code):
+    match = CODE_RE.match(code)
+
+    if not match or int(match.group(1)) < 1:
+        return None
+
+    return int(match.group(1))
+
+
+def makeUuid(prefix, number):
+    return f"{prefix}{number:031d}"
+
+
+def parseUuid(uuid):
+    """Returns (prefix, number) of a fixture UUID, or (None, None)"""
+    if len(uuid) != 32 or not uuid[1:].isdigit():
+        return None, None
+
+    return uuid[0], int(uuid[1:])
+
+
+def footprintGroup(number, share):
+    return (number - 1) // max(1, share)
+
+
+def searchEntry(code):
+    number = partNumber(code)
+
+    return {
+        "uuid": makeUuid("d", number),
+        "product_code": code,
+        "display_title": f"Part {code}"
+    }
+
+
+def device(uuid, options):
+    prefix, number = parseUuid(uuid)
+
+    if prefix != "d":
+        return None
+
+    group = footprintGroup(number, options.share)
+
+    return {
+        "uuid": uuid,
+        "product_code": f"C{number}",
+        "display_title": f"Part C{number}",
+        "symbol_type": 2,
+        "footprint_type": 4,
+        "footprint": {"display_title": f"FOOTPRINT_{group}"},
+        "attributes": {
+            "Manufacturer": "Bench",
+            "Symbol": makeUuid("s", number),
+            "Footprint": makeUuid("f", group),
+            "3D Model": makeUuid("m", group) + "|" + makeUuid("o", 0),
+            "3D Model Title": f"MODEL_{group}",
+            "3D Model Transform": "100,50,0,0,0,0,0,0,0"
+        }
+    }
+
+
+def component(uuid, blobBase):
+    prefix, number = parseUuid(uuid)
+
+    if prefix in ("s", "f"):
+        return {
+            "uuid": uuid,
+            "display_title": f"{'SYMBOL' if prefix == 's' else 'FOOTPRINT'}_{number}",
+            "dataStrId": blobBase + uuid,
+            "key": KEY_HEX,
+            "iv": IV_HEX
+        }
+
+    if prefix == "m":
+        return {
+            "uuid": uuid,
+            "display_title": f"MODEL_{number}",
+            "dataStr": json.dumps({"model": makeUuid("x", number)})
+        }
+
+    return None
+
+
+def componentContent(uuid, options):
+    """Symbol or footprint source, in the line-based JSON format of EasyEDA Pro"""
+    prefix, number = parseUuid(uuid)
+    docType = "SYMBOL" if prefix == "s" else "FOOTPRINT"
+
+    lines = [json.dumps(["DOCTYPE", docType, "1.1"]), json.dumps(["HEAD", {"uuid": uuid}])]
+
+    for i in range(40 if prefix == "s" else 120):
+        lines.append(json.dumps(["PIN" if prefix == "s" else "PAD", f"e{i}", 0, i, i * 10.0, i * 5.0, 10, 180, None, 0]))
+
+    return "\n".join(lines)
+
+
+def encryptedBlob(text):
+    """gzip compressed and AES-GCM encrypted content, with the tag appended"""
+    cipher = AES.new(bytes.fromhex(KEY_HEX), AES.MODE_GCM, nonce=bytes.fromhex(IV_HEX))
+    ciphertext, tag = cipher.encrypt_and_digest(gzip.compress(text.encode("utf-8")))
+    return ciphertext + tag
+
+
+def stepModel(uuid, options):
+    header = (f"ISO-10303-21;\nHEADER;\nFILE_NAME('{uuid}.step','',(''),(''),'','','');\nENDSEC;\nDATA;\n").encode("ascii")
+    footer = b"ENDSEC;\nEND-ISO-10303-21;\n"
+
+    line = b"#1=CARTESIAN_POINT('',(0.,0.,0.));\n"
+    count = max(0, (options.step_size * 1024 - len(header) - len(footer)) // len(line))
+
+    return header + line * count + footer
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+"""Import time of the plugin package, as paid by KiCad at startup.
+
+    python bench/import_time.py
+    python bench/import_time.py --budget 20 --runs 10
+
+Imports the package in fresh interpreters with -X importtime, and reports the
+median time spent in the plugin's own imports. pcbnew and wx are loaded by KiCad
+before any plugin, so they are imported up front and not counted. Outside KiCad's
+Python, a stand-in pcbnew module with an ActionPlugin class is used.
+
+Exits with 1 if the median is over --budget milliseconds, or if registration
+imports a module that should only be loaded on the first Run().
+"""
+import os
+import re
+import sys
+import argparse
+import statistics
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PLUGIN_DIR = os.path.dirname(BENCH_DIR)
+
+PACKAGE_NAME = "jlc_kicad_lib_loader"
+
+# Modules that must not be imported before the first Run()
+DEFERRED_MODULES = ["requests", "wx.html2", "wx.dataview", "ctypes", "concurrent.futures",
+                    f"{PACKAGE_NAME}.component_loader", f"{PACKAGE_NAME}.easyeda_lib_loader_window"]
+
+# Run in the child interpreter. Maps the plugin directory to a package, like KiCad
+# does with the plugin folder, and imports it, which registers the action plugin.
+CHILD_SCRIPT = r"""
+import sys, types, importlib.util
+
+try:
+    import pcbnew
+except ImportError:
+    pcbnew = types.ModuleType("pcbnew")
+
+    class ActionPlugin:
+        def register(self):
+            self.defaults()
+
+    pcbnew.ActionPlugin = ActionPlugin
+    sys.modules["pcbnew"] = pcbnew
+
+try:
+    import wx
+except ImportError:
+    pass
+
+sys.stderr.write("--- plugin import ---\n")
+
+spec = importlib.util.spec_from_file_location(%(name)r, %(init)r, submodule_search_locations=[%(path)r])
+module = importlib.util.module_from_spec(spec)
+sys.modules[%(name)r] = module
+spec.loader.exec_module(module)
+
+sys.stderr.write("--- loaded modules ---\n")
+sys.stderr.write("\n".join(sorted(sys.modules)) + "\n")
+"""
+
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+# Returns (total microseconds, {module: cumulative microseconds} of top-level imports, loaded module names)
+def measureOnce(python):
+    script = CHILD_SCRIPT % {
+        "name": PACKAGE_NAME,
+        "init": os.path.join(PLUGIN_DIR, "__init__.py"),
+        "path": PLUGIN_DIR
+    }
+
+    stderr = subprocess.run([python, "-X", "importtime", "-c", script], stderr=subprocess.PIPE,
+                            stdout=subprocess.DEVNULL, text=True, check=True).stderr
+
+    _, _, plugin = stderr.partition("--- plugin import ---\n")
+    timings, _, loaded = plugin.partition("--- loaded modules ---\n")
+
+    total = 0
+    topLevel = {}
+
+    for line in timings.splitlines():
+        match = IMPORTTIME_RE.match(line)
+
+        if not match:
+            continue
+
+        self_us, cumulative, indent, name = match.groups()
+        total += int(self_us)
+
+        # Imports done directly by the package, or by the plugin's own modules
+        if len(indent) <= 3 or name.startswith(PACKAGE_NAME):
+            topLevel[name] = max(topLevel.get(name, 0), int(cumulative))
+
+    # The package itself is executed directly, so it has no importtime line
+    return total, topLevel, set(loaded.split())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the import time of the plugin package.")
+    parser.add_argument("--python", default=sys.executable, help="Interpreter to use, e.g. the Python of KiCad")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreters to measure")
+    parser.add_argument("--budget", type=float, default=10, help="Maximum median import time in milliseconds")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to show")
+    options = parser.parse_args(argv)
+
+    totals = []
+    slowest = {}
+    loaded = set()
+
+    for _ in range(max(1, options.runs)):
+        total, topLevel, loaded = measureOnce(options.python)
+        totals.append(total)
+
+        for name, us in topLevel.items():
+            slowest.setdefault(name, []).append(us)
+
+    median = statistics.median(totals) / 1000
+    print(f"Plugin import: {median:.1f} ms median, {min(totals) / 1000:.1f} ms min over {len(totals)} runs (budget {options.budget:g} ms)")
+
+    ranked = sorted(slowest.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+
+    for name, us in ranked[:options.top]:
+        print("  %8.1f ms  %s" % (statistics.median(us) / 1000, name))
+
+    deferred = [name for name in DEFERRED_MODULES if name in loaded]
+    failed = False
+
+    if deferred:
+        print(f"Imported at registration, should be deferred to Run(): {', '.join(deferred)}")
+        failed = True
+
+    if median > options.budget:
+        print(f"Import time is over the budget of {options.budget:g} ms")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
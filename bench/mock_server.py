@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+"""Local stand-in for the EasyEDA API, for benchmarks.
+
+Serves searchByCodes, device and component info, AES-GCM encrypted dataStrId
+blobs and STEP models, generated from the fixtures in fixtures.py, with
+configurable latency and failure injection:
+
+    python bench/mock_server.py --port 8808 --latency 50 --fail-rate 0.01
+
+Parts C1, C2, ... exist; other codes are reported as not found.
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import urllib.parse
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import fixtures
+
+
+class MockApi:
+    def __init__(self, base, options):
+        self.base = base
+        self.options = options
+        self.random = random.Random(options.seed)
+        self.randomLock = threading.Lock()
+        self.blobs = {}
+        self.blobsLock = threading.Lock()
+        self.requestCount = 0
+
+    def delay(self):
+        if self.options.latency <= 0:
+            return
+
+        with self.randomLock:
+            latency = self.random.gauss(self.options.latency, self.options.latency * self.options.jitter)
+
+        time.sleep(max(0.0, latency) / 1000)
+
+    def shouldFail(self):
+        with self.randomLock:
+            self.requestCount += 1
+            return self.random.random() < self.options.fail_rate
+
+    def blob(self, uuid):
+        with self.blobsLock:
+            data = self.blobs.get(uuid)
+
+        if data is None:
+            data = fixtures.encryptedBlob(fixtures.componentContent(uuid, self.options))
+
+            with self.blobsLock:
+                self.blobs[uuid] = data
+
+        return data
+
+    # Returns (status, content type, body) for a request, or None if the path is unknown
+    def handle(self, method, path, form):
+        if method == "POST" and path == "/api/v2/devices/searchByCodes":
+            codes = form.get("codes[]", [])
+            result = [fixtures.searchEntry(code) for code in codes if fixtures.partNumber(code) is not None]
+            return self.json({"success": True, "code": 0, "result": result})
+
+        if method != "GET":
+            return None
+
+        if path.startswith("/api/devices/"):
+            device = fixtures.device(path.rsplit("/", 1)[1], self.options)
+            return self.json({"success": True, "result": device}) if device else self.notFound()
+
+        if path.startswith("/api/v2/components/"):
+            component = fixtures.component(path.rsplit("/", 1)[1], f"{self.base}/blobs/")
+            return self.json({"success": True, "result": component}) if component else self.notFound()
+
+        if path.startswith("/blobs/"):
+            return 200, "application/octet-stream", self.blob(path.rsplit("/", 1)[1])
+
+        if path.startswith("/step/"):
+            return 200, "application/octet-stream", fixtures.stepModel(path.rsplit("/", 1)[1], self.options)
+
+        return None
+
+    def json(self, data):
+        return 200, "application/json", json.dumps(data).encode("utf-8")
+
+    def notFound(self):
+        return 404, "application/json", json.dumps({"success": False, "code": 404}).encode("utf-8")
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True # Headers and body are written separately
+    api: MockApi = None
+
+    def do_GET(self):
+        self.respond("GET")
+
+    def do_POST(self):
+        self.respond("POST")
+
+    def respond(self, method):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        form = urllib.parse.parse_qs(body.decode("utf-8"))
+        path = urllib.parse.urlsplit(self.path).path
+
+        self.api.delay()
+
+        if self.api.shouldFail():
+            response = (self.api.options.fail_status, "text/plain", b"Injected failure")
+        else:
+            response = self.api.handle(method, path, form) or (404, "text/plain", b"Not found")
+
+        status, contentType, data = response
+
+        self.send_response(status)
+        self.send_header("Content-Type", contentType)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def addServerArguments(parser):
+    parser.add_argument("--latency", type=float, default=20, help="Mean response latency in milliseconds")
+    parser.add_argument("--jitter", type=float, default=0.25, help="Latency standard deviation, relative to the mean")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--fail-status", type=int, default=503, help="HTTP status of failed requests")
+    parser.add_argument("--step-size", type=int, default=200, help="STEP model size in KB")
+    parser.add_argument("--share", type=int, default=10, help="Number of parts sharing a footprint and 3D model")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for latency and failures")
+
+
+def createServer(options, host="127.0.0.1", port=0):
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+
+    Handler.api = MockApi(f"http://{host}:{server.server_address[1]}", options)
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the EasyEDA API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="Port to listen on, 0 picks a free port")
+    addServerArguments(parser)
+    options = parser.parse_args(argv)
+
+    server = createServer(options, options.host, options.port)
+
+    # The benchmark runner reads the address from the first line
+    print(f"Listening on {Handler.api.base}", flush=True)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
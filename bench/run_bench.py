@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+"""End-to-end benchmark of ComponentLoader.downloadAll against the local mock server.
+
+    python bench/run_bench.py
+    python bench/run_bench.py --sizes 10,100 --engine asyncio --latency 50 --fail-rate 0.02
+
+Each BOM size runs in its own process, so peak RSS is measured per size.
+Reports parts/s, p50/p95 time per stage and peak RSS. 3D models are
+downloaded but not converted, as conversion needs pcbnew.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PLUGIN_DIR = os.path.dirname(BENCH_DIR)
+
+STAGES = ["device", "component", "dataStr", "library", "model"]
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def peakRssMb():
+    try:
+        import resource
+    except ImportError:
+        return None # Not available on Windows
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Bytes on macOS, kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# Run one benchmark in this process, and return its results
+def runOnce(options):
+    sys.path.insert(0, PLUGIN_DIR)
+    import cli
+    import requests
+
+    component_loader = cli.importPluginModule("component_loader")
+    rate_limiter = cli.importPluginModule("rate_limiter")
+
+    logging.basicConfig(stream=sys.stderr, level=logging.DEBUG if options.debug else logging.WARNING,
+                        format="%(levelname)s: %(message)s")
+
+    session = requests.Session()
+    component_loader.configureSession(session)
+    session.mount("http://", rate_limiter.createAdapter("*"))
+
+    parts = [f"C{i}" for i in range(1, options.size + 1)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        loader = component_loader.ComponentLoader(
+            kiprjmod=os.path.join(tmp, "project"),
+            target_path=os.path.join(tmp, "library"),
+            target_name="Bench",
+            progress=lambda current, total: None,
+            session=session,
+            max_workers=options.jobs,
+            fixup_models=False,
+            engine=options.engine,
+            journal=False,
+            force_refresh=True,
+            api_base=options.base,
+            step_url_format=options.base + "/step/{uuid}"
+        )
+
+        start = time.perf_counter()
+        result = loader.downloadAll(parts)
+        elapsed = time.perf_counter() - start
+
+    stages = {}
+
+    for stage in STAGES:
+        timings = [part.timings[stage] for part in result.parts.values() if stage in part.timings]
+        stages[stage] = {"p50": percentile(timings, 0.5), "p95": percentile(timings, 0.95)}
+
+    return {
+        "size": options.size,
+        "engine": options.engine,
+        "seconds": elapsed,
+        "parts_per_second": options.size / elapsed if elapsed else None,
+        "ok": len(result.succeeded()),
+        "failed": len(result.failed()),
+        "megabytes": sum(part.bytes for part in result.parts.values()) / (1024 * 1024),
+        "stages": stages,
+        "peak_rss_mb": peakRssMb()
+    }
+
+
+def startServer(options):
+    args = [sys.executable, os.path.join(BENCH_DIR, "mock_server.py"),
+            "--latency", str(options.latency), "--jitter", str(options.jitter),
+            "--fail-rate", str(options.fail_rate), "--step-size", str(options.step_size),
+            "--share", str(options.share)]
+
+    server = subprocess.Popen(args, stdout=subprocess.PIPE, text=True)
+    line = server.stdout.readline()
+
+    if not line.startswith("Listening on "):
+        server.kill()
+        raise Exception(f"Mock server failed to start: {line!r}")
+
+    return server, line.split()[-1]
+
+
+def formatMs(seconds):
+    return "-" if seconds is None else "%.0f" % (seconds * 1000)
+
+
+def formatReport(results, options):
+    lines = [f"engine={options.engine} jobs={options.jobs or 'default'} latency={options.latency}ms "
+             f"fail-rate={options.fail_rate} step-size={options.step_size}KB share={options.share}", ""]
+
+    header = "%6s %8s %8s %6s %7s %9s" % ("parts", "seconds", "parts/s", "failed", "MB", "peak RSS")
+    header += "".join(" %17s" % f"{stage} p50/p95" for stage in STAGES)
+    lines.append(header)
+
+    for r in results:
+        rss = "-" if r["peak_rss_mb"] is None else "%.0f MB" % r["peak_rss_mb"]
+        line = "%6d %8.2f %8.1f %6d %7.1f %9s" % (r["size"], r["seconds"], r["parts_per_second"], r["failed"], r["megabytes"], rss)
+        line += "".join(" %17s" % f"{formatMs(r['stages'][stage]['p50'])}/{formatMs(r['stages'][stage]['p95'])} ms" for stage in STAGES)
+        lines.append(line)
+
+    return "\n".join(lines)
+
+
+def parseArgs(argv):
+    sys.path.insert(0, BENCH_DIR)
+    import mock_server
+
+    parser = argparse.ArgumentParser(description="Benchmark ComponentLoader against a local EasyEDA API stand-in.")
+    parser.add_argument("--sizes", default="10,100,1000", help="Comma separated BOM sizes")
+    parser.add_argument("--engine", choices=["threads", "asyncio"], default="threads")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Number of concurrent requests")
+    parser.add_argument("--output", help="Also write the report to this file")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("-v", "--debug", action="store_true", help="Enable debug logging")
+    mock_server.addServerArguments(parser)
+
+    # Used by the parent process to run a single size
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--base", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    options = parseArgs(argv)
+
+    if options.size:
+        print(json.dumps(runOnce(options)))
+        return 0
+
+    server, base = startServer(options)
+    results = []
+
+    try:
+        for size in [int(s) for s in options.sizes.split(",") if s.strip()]:
+            args = [sys.executable, os.path.abspath(__file__), "--size", str(size), "--base", base, "--engine", options.engine]
+
+            if options.jobs:
+                args += ["--jobs", str(options.jobs)]
+            if options.debug:
+                args.append("--debug")
+
+            output = subprocess.run(args, stdout=subprocess.PIPE, text=True, check=True).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+            print(f"{size} parts: {results[-1]['seconds']:.2f} s", file=sys.stderr)
+    finally:
+        server.terminate()
+        server.wait()
+
+    report = json.dumps(results, indent=4) if options.json else formatReport(results, options)
+    print(report)
+
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+"""Download JLCPCB/LCSC parts into an EasyEDA library without the KiCad GUI.
+
+Run it with the Python interpreter that has the plugin dependencies installed:
+
+    python cli.py --library /path/to/EasyEDA_Lib C2040 C25804
+    python cli.py --library /path/to/EasyEDA_Lib --bom bom.csv --jobs 16
+
+pcbnew is only needed to convert 3D models. Without it, models are downloaded
+as <name>.step_jlc and converted by the next run that has pcbnew available.
+"""
+import os
+import re
+import sys
+import csv
+import types
+import logging
+import argparse
+import importlib
+import importlib.util
+
+EXIT_OK = 0
+EXIT_PARTIAL = 1 # Some parts or models failed
+EXIT_USAGE = 2
+EXIT_FAILED = 3
+
+PACKAGE_NAME = "jlc_kicad_lib_loader"
+
+CODE_RE = re.compile(r"^C\d+$")
+CODE_COLUMN_RE = re.compile(r"lcsc|jlc|supplier part|part ?#", re.IGNORECASE)
+
+
+# When run as a script, the plugin directory is mapped to a package without
+# running its __init__, which registers the KiCad action plugin.
+def pluginPackage():
+    if __package__:
+        return __package__
+
+    if PACKAGE_NAME not in sys.modules:
+        module = types.ModuleType(PACKAGE_NAME)
+        module.__path__ = [os.path.dirname(os.path.abspath(__file__))]
+        sys.modules[PACKAGE_NAME] = module
+
+    return PACKAGE_NAME
+
+
+# STEP conversion worker processes import this script as their main module,
+# so the package has to be set up at import time
+PLUGIN_PACKAGE = pluginPackage()
+
+
+def importPluginModule(name):
+    return importlib.import_module(f"{PLUGIN_PACKAGE}.{name}")
+
+
+# Read part codes or UUIDs from a CSV BOM, or from a text file with one part per line
+def readBom(path):
+    f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8-sig", newline="")
+
+    try:
+        content = f.read()
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+    if not path.lower().endswith(".csv"):
+        return [line.strip() for line in content.splitlines() if line.strip()]
+
+    rows = list(csv.reader(content.splitlines()))
+    if not rows:
+        return []
+
+    # Prefer a supplier part number column, otherwise take every cell that looks like a C-code
+    codeColumns = [i for i, name in enumerate(rows[0]) if CODE_COLUMN_RE.search(name)]
+    parts = []
+
+    for row in rows[1:] if codeColumns else rows:
+        cells = [row[i] for i in codeColumns if i < len(row)] if codeColumns else row
+
+        for cell in cells:
+            # Merged BOM lines can contain several codes
+            for code in re.split(r"[\s,;]+", cell.strip()):
+                if CODE_RE.match(code) and code not in parts:
+                    parts.append(code)
+
+    return parts
+
+
+def makeProgressPrinter(stream):
+    lastPercent = [-1]
+
+    def progress(current, total):
+        percent = int(current * 100 / total) if total else 0
+
+        if percent == lastPercent[0]:
+            return
+
+        lastPercent[0] = percent
+
+        if stream.isatty():
+            stream.write(f"\r{percent:3d}% ({current}/{total})")
+            if percent >= 100:
+                stream.write("\n")
+            stream.flush()
+        elif percent % 10 == 0:
+            stream.write(f"{percent:3d}% ({current}/{total})\n")
+
+    return progress
+
+
+def parseArgs(argv):
+    parser = argparse.ArgumentParser(description="Download JLCPCB/LCSC parts into an EasyEDA (.elibz) library.")
+    parser.add_argument("parts", nargs="*", help="JLCPCB/LCSC codes or device UUIDs")
+    parser.add_argument("--bom", help="CSV BOM, or a text file with one part per line ('-' for stdin)")
+    parser.add_argument("--library", required=True, help="Library directory; the library is named after it")
+    parser.add_argument("--project", default=os.getenv("KIPRJMOD") or os.getcwd(),
+                        help="Project directory for 3D models (default: $KIPRJMOD or the current directory)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Number of concurrent requests")
+    parser.add_argument("--engine", choices=["threads", "asyncio"], default="threads",
+                        help="Run download stages one after another (threads), or stream parts through them (asyncio)")
+    parser.add_argument("--batch-size", type=int, default=None, help="Part codes per search request")
+    parser.add_argument("--shards", type=int, default=0, help="Split the library into this many .elibz shards")
+    parser.add_argument("--offline", action="store_true", help="Use only cached metadata")
+    parser.add_argument("--no-cache", action="store_true", help="Don't use the response cache")
+    parser.add_argument("--no-model-store", action="store_true", help="Don't use the shared 3D model store")
+    parser.add_argument("--no-datastr-cache", action="store_true", help="Don't use the cache of decrypted symbol and footprint data")
+    parser.add_argument("--no-fixup", action="store_true", help="Don't convert 3D models, even if pcbnew is available")
+    parser.add_argument("--parallel-fixup", action="store_true", help="Convert 3D models in worker processes")
+    parser.add_argument("--force-refresh", action="store_true", help="Download parts again even if they are in the library")
+    parser.add_argument("--no-journal", action="store_true", help="Don't resume from, or write, the job journal of the library")
+    parser.add_argument("--failed-output", help="Write the parts that failed to this file, to retry them with --bom")
+    parser.add_argument("--dump-dir", help="Write raw API responses to this directory")
+    parser.add_argument("--profile", action="store_true", help="Log per-stage timings with a cProfile and tracemalloc summary")
+    parser.add_argument("-v", "--debug", action="store_true", help="Enable debug logging")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parseArgs(argv)
+
+    logging.basicConfig(stream=sys.stderr, level=logging.DEBUG if args.debug else logging.INFO,
+                        format="%(levelname)s: %(message)s")
+
+    parts = list(args.parts)
+
+    if args.bom:
+        try:
+            parts += readBom(args.bom)
+        except OSError as e:
+            logging.error(f"Cannot read BOM: {e}")
+            return EXIT_USAGE
+
+    if not parts:
+        logging.error("No parts to download.")
+        return EXIT_USAGE
+
+    if sys.platform == "darwin":
+        # SSL fix for macOS KiCad Python
+        try:
+            import certifi
+            os.environ.setdefault("SSL_CERT_FILE", certifi.where())
+        except Exception:
+            pass
+
+    import requests
+
+    component_loader = importPluginModule("component_loader")
+    http_cache = importPluginModule("http_cache")
+    model_store = importPluginModule("model_store")
+    datastr_cache = importPluginModule("datastr_cache")
+    version = importPluginModule("version")
+
+    fixup = not args.no_fixup
+    if fixup and importlib.util.find_spec("pcbnew") is None:
+        logging.warning("pcbnew is not available, 3D models will be downloaded without conversion.")
+        fixup = False
+
+    session = requests.Session()
+    session.headers.update({"User-Agent": version.DEFAULT_USER_AGENT})
+    component_loader.configureSession(session)
+
+    target_path = os.path.abspath(args.library)
+
+    loader = component_loader.ComponentLoader(
+        kiprjmod=os.path.abspath(args.project),
+        target_path=target_path,
+        target_name=os.path.basename(target_path),
+        progress=makeProgressPrinter(sys.stderr),
+        session=session,
+        cache=None if args.no_cache else http_cache.ResponseCache(offline=args.offline),
+        search_batch_size=args.batch_size or component_loader.SEARCH_BATCH_SIZE,
+        shard_count=args.shards,
+        fixup_processes=(os.cpu_count() or 1) if args.parallel_fixup else 0,
+        model_store=None if args.no_model_store else model_store.ModelStore(),
+        max_workers=args.jobs,
+        fixup_models=fixup,
+        engine=args.engine,
+        journal=not args.no_journal,
+        force_refresh=args.force_refresh,
+        dump_dir=args.dump_dir,
+        profile=args.profile,
+        datastr_cache=None if args.no_datastr_cache else datastr_cache.DataStrCache()
+    )
+
+    result = loader.downloadAll(parts)
+
+    if args.failed_output:
+        # One part per line, can be passed back with --bom to retry
+        with open(args.failed_output, "w", encoding="utf-8") as f:
+            f.writelines(f"{part.part}\n" for part in result.failed())
+
+    if result.error:
+        return EXIT_FAILED
+
+    if result.failed():
+        return EXIT_PARTIAL
+
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,88 +1,575 @@
-import copy
 import os
+import sys
 import json
+import time
 import traceback
 import requests
 import concurrent.futures
-import zipfile
-import urllib
+import multiprocessing
 
-from logging import info, warning, debug, error, critical
-from typing import Callable
+from logging import info, warning, debug, error, critical, log
+from typing import Callable, Optional
 
-from pcbnew import *
+from .http_cache import ResponseCache, MemoryLRU
+from .rate_limiter import createAdapter
+from .elibz_writer import ElibzWriter
+from .library_storage import ShardedLibrary
+from .model_store import ModelStore, modelKey
+from .datastr_cache import DataStrCache, dataStrKey
+from .step_fixup import timedFixupStepModel, findPythonExecutable, probePcbnew
+from .download_result import DownloadResult, STATUS_OK, STATUS_FAILED, STATUS_SKIPPED
+from .job_journal import JobJournal
+from .metrics import ModelMetrics, StageTimers
+from .profiling import RunProfiler, profilingRequested
+from .debug_log import LazyJson, createDumper, debugResponse, debugEnabled
 
 
 MODELS_DIR = "EASYEDA_MODELS"
 
+# Number of C-codes per searchByCodes request, and number of concurrent requests
+SEARCH_BATCH_SIZE = 50
+SEARCH_WORKERS = 4
+
+# Number of dataStrId blobs fetched and decrypted concurrently
+DATASTR_WORKERS = 8
+
+# EasyEDA API and STEP model locations, overridable for testing against a local server
+API_BASE = "https://pro.easyeda.com"
+STEP_URL_FORMAT = "https://modules.easyeda.com/qAxj6KHrDKw4blvCG8QJPs7Y/{uuid}"
+# Name prefix of the loader's worker threads, which are profiled with the thread running downloadAll
+WORKER_THREAD_NAME = "jlc-loader"
+
+# Upper bound of concurrent STEP downloads, the actual number is adapted by the rate limiter,
+# which holds a slot until the body of a streamed response is read
+STEP_DOWNLOAD_WORKERS = 16
+STEP_DOWNLOAD_TIMEOUT = (10, 60)
+STEP_CHUNK_SIZE = 64 * 1024
+STEP_CHECK_SIZE = 1024
+
+# Seconds to wait for a worker process to import pcbnew
+FIXUP_PROBE_TIMEOUT = 60
+
+# Mount adapters that limit concurrent requests per host, adapting the limit to throttling
+# (429) and server errors, and retry with backoff. Connections are kept alive and reused
+# between requests. host_limits maps host names to (initial, minimum, maximum) limits.
+def configureSession(session: requests.Session, host_limits=None):
+    for host in ("pro.easyeda.com", "modules.easyeda.com"):
+        session.mount(f"https://{host}/", createAdapter(host, host_limits))
+
+    # dataStrId blobs and other hosts
+    session.mount("https://", createAdapter("*", host_limits))
+
+    return session
+
 # UUID strings can be in the format <uuid>|<owner_uuid>. This function gets the <uuid> part
 def getUuidFirstPart(uuid):
     if not uuid:
         return None
     return uuid.split("|")[0]
 
+# dataStr of dataStrId blobs is kept as bytes; JSON fields like a 3D model's dataStr need text
+def dataStrText(dataStr):
+    return dataStr.decode("utf-8") if isinstance(dataStr, (bytes, bytearray)) else dataStr
+
+# Check that a downloaded STEP model is complete. Returns a problem description, or None if the file is valid.
+def verifyStepFile(path):
+    with open(path, "rb") as f:
+        head = f.read(STEP_CHECK_SIZE)
+        f.seek(max(0, os.path.getsize(path) - STEP_CHECK_SIZE))
+        tail = f.read()
+
+    if head.startswith(b"\x1f\x8b"):
+        return None # gzip compressed STEP, verified when loading
+
+    if not head.lstrip(b"\xef\xbb\xbf \t\r\n").startswith(b"ISO-10303-21;"):
+        return "missing STEP header"
+
+    if b"END-ISO-10303-21;" not in tail:
+        return "truncated STEP file"
+
+    return None
+
+class ModelTask():
+    def __init__(self, directUuid, kfilePath, transform, storeKey, devUuid):
+        self.directUuid = directUuid
+        self.kfilePath = kfilePath
+        self.transform = transform
+        self.storeKey = storeKey
+        self.devUuids = [devUuid] # Devices that use this model
+        self.failure = None # (stage, error) if the download or conversion failed
+
+    # Model plans are stored in the job journal, with paths relative to the project
+    def toJournal(self, kiprjmod):
+        return {
+            "uuid": self.directUuid,
+            "file": os.path.relpath(self.kfilePath, kiprjmod),
+            "transform": self.transform,
+            "key": self.storeKey
+        }
+
+    @staticmethod
+    def fromJournal(data, kiprjmod, devUuid):
+        return ModelTask(data["uuid"], os.path.normpath(os.path.join(kiprjmod, data["file"])),
+                         data["transform"], data["key"], devUuid)
+
 class ComponentLoader():
-    def __init__(self, kiprjmod, target_path, target_name, progress: Callable[[int, int], None], session: requests.Session):
+    def __init__(self, kiprjmod, target_path, target_name, progress: Callable[[int, int], None], session: requests.Session,
+                 cache: Optional[ResponseCache] = None, search_batch_size=SEARCH_BATCH_SIZE, shard_count=0,
+                 fixup_processes=0, model_store: Optional[ModelStore] = None, max_workers=None, fixup_models=True,
+                 engine="threads", journal=True, force_refresh=False, dump_dir=None,
+                 device_cache: Optional[MemoryLRU] = None, api_base=API_BASE, step_url_format=STEP_URL_FORMAT,
+                 profile=False, datastr_cache: Optional[DataStrCache] = None):
         self.kiprjmod = kiprjmod
         self.target_path = target_path
         self.target_name = target_name
         self.progress = progress
         self.session = session
+        self.cache = cache
+        self.search_batch_size = search_batch_size
+        self.shard_count = shard_count # 0 stores the library in a single .elibz
+        self.fixup_processes = fixup_processes # 0 converts STEP models in-process
+        self.model_store = model_store
+        self.max_workers = max_workers # None uses the ThreadPoolExecutor default for API requests
+        self.fixup_models = fixup_models # False leaves downloaded models unconverted, as <name>.step_jlc
+        self.engine = engine # "threads" runs the download stages one after another, "asyncio" streams parts through them
+        self.use_journal = journal # Resume earlier downloads to the same library from their job journal
+        self.journal: Optional[JobJournal] = None
+        self.force_refresh = force_refresh # True downloads parts again even if they are in the library
+        self.dumper = createDumper(dump_dir) # Writes raw API responses to files instead of the debug log
+        self.device_cache = device_cache # Device info by UUID, shared with the search preview
+        self.datastr_cache = datastr_cache # Decrypted dataStrId blobs, shared between projects
+        self.api_base = api_base
+        self.step_url_format = step_url_format
+        self.profile = profile or profilingRequested() # Capture cProfile and tracemalloc statistics of downloadAll
+        self.timers = StageTimers()
+        self.missingCodes = []
+        self.modelStats = ModelMetrics(progress)
+        self.result = DownloadResult()
+        self.dataStrErrors = {} # Component UUID to the reason its dataStr couldn't be resolved
+
+    # GET a JSON API response, through the response cache if enabled
+    def getJson(self, kind, key, url):
+        if self.cache:
+            return self.cache.getJson(self.session, kind, key, url)
+
+        r = self.session.get(url)
+        r.raise_for_status()
+        return r.json()
+
+    # Resolve C-codes to device UUIDs, using cached mappings where possible.
+    # Codes that cannot be resolved are reported and collected in self.missingCodes.
+    def searchByCodes(self, codes):
+        uuids, batches = self.planCodeSearch(codes)
+
+        with concurrent.futures.ThreadPoolExecutor(SEARCH_WORKERS, thread_name_prefix=WORKER_THREAD_NAME) as executor:
+            for batchUuids in executor.map(self.searchBatch, batches):
+                uuids.extend(batchUuids)
+
+        return uuids
+
+    # Returns UUIDs of cached codes, and batches of codes to search for
+    def planCodeSearch(self, codes):
+        uuids = []
+        remaining = []
+
+        for code in codes:
+            cached = self.cache.get("codes", code) if self.cache else None
+
+            if cached:
+                uuids.append(cached["uuid"])
+                self.result.setDevice(code, cached["uuid"])
+            elif code not in remaining:
+                remaining.append(code)
+
+        if remaining and self.cache and self.cache.offline:
+            for code in remaining:
+                warning(f"Part {code} is not in the cache (offline mode)")
+                self.result.part(code).fail("search", "not in the cache (offline mode)")
+            self.missingCodes.extend(remaining)
+            return uuids, []
+
+        batchSize = max(1, self.search_batch_size)
+        return uuids, [remaining[i:i + batchSize] for i in range(0, len(remaining), batchSize)]
+
+    # Search for a batch of codes. Returns UUIDs of the devices found.
+    def searchBatch(self, batch):
+        uuids = []
+        foundCodes = set()
+
+        try:
+            entries = self.searchCodeBatch(batch)
+        except Exception as e:
+            error(f"Failed to search parts {', '.join(batch)}: {e}")
+
+            for code in batch:
+                self.result.part(code).fail("search", e)
+            return uuids
+
+        for entry in entries:
+            uuids.append(entry['uuid'])
 
+            if entry.get("product_code"):
+                foundCodes.add(entry["product_code"])
+                self.result.setDevice(entry["product_code"], entry["uuid"])
+
+                if self.cache:
+                    self.cache.put("codes", entry["product_code"], {"uuid": entry["uuid"]})
+
+        for code in batch:
+            if code not in foundCodes:
+                warning(f"Part {code} was not found")
+                self.missingCodes.append(code)
+                self.result.part(code).fail("search", "not found")
+
+        return uuids
+
+    # Send one searchByCodes request. If the request is rejected, the batch is split in halves
+    # to isolate the codes that cause it. Transient failures (connection errors, timeouts,
+    # 429 and 5xx after the adapter's retries) raise, as splitting would only multiply requests.
+    def searchCodeBatch(self, codes):
+        with self.timers.time("search"):
+            resp = self.session.post(f"{self.api_base}/api/v2/devices/searchByCodes", data={"codes[]": codes})
+
+            if resp.status_code == 429 or resp.status_code >= 500:
+                resp.raise_for_status()
+
+            found = resp.json() if resp.ok else None
+
+        self.timers.addBytes("search", len(resp.content))
+
+        if found is not None:
+            debugResponse(self.dumper, "searchByCodes", "search", f"{codes[0]}_{len(codes)}", found)
+
+            if found.get("success"):
+                return found.get("result") or []
+
+            rejection = f"Unable to fetch device info: {found}"
+        else:
+            rejection = f"HTTP {resp.status_code}"
+
+        if len(codes) == 1:
+            warning(f"Failed to fetch device info for {codes[0]}: {rejection}")
+            return []
+
+        debug(f"searchByCodes rejected {len(codes)} codes, splitting: {rejection}")
+        half = len(codes) // 2
+        return self.searchCodeBatch(codes[:half]) + self.searchCodeBatch(codes[half:])
+
+    # Returns a DownloadResult with the outcome of every part. Failed parts don't stop the
+    # others; if the download failed as a whole, result.error is set.
+    # Parts recorded in the job journal by an earlier run continue from the stage that failed.
     def downloadAll(self, components):
+        code_components, direct_uuids = self.splitComponents(components)
+
+        self.result = DownloadResult(code_components + direct_uuids)
+        self.dataStrErrors = {}
+        self.timers = StageTimers()
+        profiler = RunProfiler(thread_prefix=WORKER_THREAD_NAME) if self.profile else None
+
+        if profiler:
+            profiler.start()
+
+        try:
+            return self.runDownload(code_components, direct_uuids)
+        finally:
+            # Also on KeyboardInterrupt, or when finishing the journal fails
+            if profiler:
+                profiler.stop()
+
+    # Plans and runs the download for downloadAll, and records the results in the job journal
+    def runDownload(self, code_components, direct_uuids):
+        self.journal = JobJournal(self.target_path, self.target_name) if self.use_journal else None
         self.progress(0, 100)
 
+        for dev_uuid in direct_uuids:
+            self.result.setDevice(dev_uuid, dev_uuid)
+
+        components, resumedModels = self.planResume(code_components + direct_uuids)
+        components, existingDevices = self.planSkipExisting(components)
+
         try:
-            libDeviceFile, fetched_3dmodels = self.downloadSymFp(components)
-            self.downloadModels(libDeviceFile, fetched_3dmodels)
+            if not components:
+                pass
+            elif self.engine == "asyncio":
+                from .async_engine import AsyncDownloadEngine
+                AsyncDownloadEngine(self, self.max_workers).run(components)
+            else:
+                libDeviceFile, fetched_3dmodels = self.downloadSymFp(components)
+                self.downloadModels(libDeviceFile, fetched_3dmodels)
+
+            if resumedModels:
+                self.resumeModels(resumedModels)
+
+            if existingDevices:
+                self.downloadExistingModels(existingDevices)
+
             self.progress(100, 100)
         except Exception as e:
             traceback.print_exc()
             error(f"Failed to download components: {traceback.format_exc()}")
+            self.result.abort(e)
 
-    def downloadSymFp(self, components):
-        info(f"Fetching info...")
+        self.result.finish()
+
+        if self.journal:
+            self.finishJournal()
+
+        self.result.logSummary()
+        self.timers.logSummary()
+
+        return self.result
+
+    # Use the job journal to skip finished parts. Returns the parts to download, with device UUIDs
+    # in place of codes that were already resolved, and the models of parts that only need their model.
+    def planResume(self, parts):
+        if not self.journal:
+            return parts, []
+
+        # A forced refresh downloads every part again, and records it in a fresh journal
+        if self.force_refresh:
+            for part in parts:
+                self.journal.reset(part)
+
+            return parts, []
+
+        components = []
+        models = {}
+        done = 0
+        modelOnly = 0
+
+        for part in parts:
+            entry = self.journal.entry(part)
+            stages = entry.get("stages", [])
+
+            if entry.get("device"):
+                self.result.setDevice(part, entry["device"])
+
+            # The library is shared between projects: planSkipExisting checks the model of done parts in this one
+            if JobJournal.isDone(entry):
+                components.append(entry.get("device") or part)
+                done += 1
+                continue
+
+            if "library" in stages and entry.get("model"):
+                model = ModelTask.fromJournal(entry["model"], self.kiprjmod, entry["device"])
+                modelOnly += 1
+
+                if model.directUuid in models:
+                    self.addModelDevice(models[model.directUuid], entry["device"])
+                else:
+                    models[model.directUuid] = model
+            else:
+                components.append(entry.get("device") or part)
+
+        if done or modelOnly:
+            info(f"Resuming from the job journal: {done} parts are done, {modelOnly} parts only need their 3D model")
+
+        return components, list(models.values())
+
+    # Returns library entries of parts that are already in the library, by part
+    def findExistingDevices(self, parts):
+        if self.shard_count:
+            library = ShardedLibrary(self.target_path, self.target_name, self.shard_count)
+            uuids = {part: library.index["codes"].get(part, part) for part in parts}
+            devices = library.readDevices(set(uuids.values()))
+        else:
+            devices = ElibzWriter(f"{self.target_path}/{self.target_name}.elibz").readDeviceFile()["devices"]
+            codes = {device["product_code"]: uuid for uuid, device in devices.items() if device.get("product_code")}
+            uuids = {part: codes.get(part, part) for part in parts}
+
+        return {part: devices[uuid] for part, uuid in uuids.items() if uuid in devices}
+
+    # Skip parts that are already in the library, unless force_refresh is set. Returns the parts
+    # to download, and library entries of skipped devices whose 3D model is missing from the project.
+    def planSkipExisting(self, parts):
+        if self.force_refresh or not parts:
+            return parts, []
+
+        try:
+            existing = self.findExistingDevices(parts)
+        except Exception as e:
+            warning(f"Cannot read the existing library, downloading all parts: {e}")
+            return parts, []
 
-        # Separate components into code-based and direct UUIDs
+        components = []
+        modelDevices = {}
+
+        for part in parts:
+            device = existing.get(part)
+
+            if not device:
+                components.append(part)
+                continue
+
+            # planResume replaces parts with their device UUID, which is already mapped to the requested part
+            if part != device["uuid"]:
+                self.result.setDevice(part, device["uuid"])
+
+            attributes = device.get("attributes", {})
+
+            modelPath = os.path.join(self.kiprjmod, MODELS_DIR, f"{attributes.get('3D Model Title')}.step")
+
+            if getUuidFirstPart(attributes.get("3D Model")) and not os.path.exists(modelPath):
+                modelDevices[device["uuid"]] = device
+            else:
+                self.result.device(device["uuid"]).skip()
+
+        if existing:
+            info(f"{len(existing)} parts are already in the library, use force refresh to download them again")
+
+        return components, list(modelDevices.values())
+
+    # Download missing 3D models of devices that are already in the library
+    def downloadExistingModels(self, devices):
+        info(f"Fetching 3D models of {len(devices)} parts from the library...")
+
+        modelUuids = {getUuidFirstPart(device["attributes"]["3D Model"]) for device in devices}
+        fetched_3dmodels = {}
+
+        with concurrent.futures.ThreadPoolExecutor(self.max_workers, thread_name_prefix=WORKER_THREAD_NAME) as executor:
+            futures = {executor.submit(self.fetchComponent, uuid): uuid for uuid in modelUuids}
+
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    fetched_3dmodels[futures[future]] = future.result()
+                except Exception as e:
+                    error(f"Failed to fetch component for uuid {futures[future]}: {e}")
+
+        for device in devices:
+            compResult = self.result.component(getUuidFirstPart(device["attributes"]["3D Model"]))
+
+            if compResult.error:
+                self.result.device(device["uuid"]).fail("model", compResult.error)
+
+        self.downloadModels({"devices": {device["uuid"]: device for device in devices}}, fetched_3dmodels)
+
+    # Record the results of this run in the job journal. The journal is removed when all its parts are done.
+    def finishJournal(self):
+        for result in self.result.parts.values():
+            if result.device_uuid:
+                self.journal.update(result.part, device=result.device_uuid)
+
+            if result.status in (STATUS_OK, STATUS_SKIPPED):
+                self.journal.update(result.part, "library", "model")
+                self.journal.clearFailure(result.part)
+            elif result.status == STATUS_FAILED:
+                self.journal.update(result.part, failed={"stage": result.failed_stage, "error": result.error})
+
+        if self.journal.allDone():
+            debug(f"All parts are done, removing the job journal {self.journal.path}")
+            self.journal.remove()
+        else:
+            self.journal.save()
+            info("Download the same parts again to retry the failed ones.")
+
+    # Record a completed stage of a device in the job journal
+    def journalUpdate(self, dev_uuid, *stages, **data):
+        if self.journal:
+            self.journal.update(self.result.device(dev_uuid).part, *stages, **data)
+
+    # Separate components into code-based and direct UUIDs
+    def splitComponents(self, components):
         code_components = []
         direct_uuids = []
 
         for comp in components:
+            comp = comp.strip()
+
+            if not comp:
+                continue
+
             if comp.startswith("C"):
                 code_components.append(comp)
             else:
                 direct_uuids.append(comp)
 
-        fetched_devices = {}
+        return code_components, direct_uuids
 
-        # Fetch UUIDs from code-based components
-        if code_components:
-            resp = self.session.post("https://pro.easyeda.com/api/v2/devices/searchByCodes", data={"codes[]": code_components})
-            resp.raise_for_status()
-            found = resp.json()
+    def fetchDevice(self, dev_uuid):
+        result = self.result.device(dev_uuid)
+        start = time.perf_counter()
 
-            debug("searchByCodes: " + json.dumps(found, indent=4))
+        if self.device_cache:
+            device = self.device_cache.get(dev_uuid)
 
-            if not found.get("success") or not found.get("result"):
-                raise Exception(f"Unable to fetch device info: {found}")
+            if device is not None:
+                debug(f"Device {dev_uuid} from the memory cache")
+                return device
 
-            # Append fetched UUIDs to direct_uuids
-            for entry in found["result"]:
-                direct_uuids.append(entry['uuid'])
+        try:
+            dev_info = self.getJson("devices", dev_uuid, f"{self.api_base}/api/devices/{dev_uuid}")
 
-        # Fetch device info by UUID
-        def fetch_device_info(dev_uuid):
-            dev_info = self.session.get(f"https://pro.easyeda.com/api/devices/{dev_uuid}")
-            dev_info.raise_for_status()
+            debugResponse(self.dumper, "device info", "devices", dev_uuid, dev_info)
+
+            if not dev_info.get("result"):
+                raise Exception(f"No device info: {dev_info.get('message') or dev_info.get('code')}")
+
+            if self.device_cache:
+                self.device_cache.put(dev_uuid, dev_info["result"])
+
+            return dev_info["result"]
+        except Exception as e:
+            result.fail("device", e)
+            raise
+        finally:
+            result.addTiming("device", time.perf_counter() - start)
+            self.timers.add("device", time.perf_counter() - start)
+
+    def fetchComponent(self, uuid):
+        result = self.result.component(uuid)
+        start = time.perf_counter()
+
+        try:
+            url = f"{self.api_base}/api/v2/components/{uuid}"
+            compData = self.getJson("components", uuid, url)["result"]
+
+            debugResponse(self.dumper, "Fetched component", "components", uuid, compData)
+
+            return compData
+        except Exception as e:
+            result.fail("component", e)
+            raise
+        finally:
+            result.addTiming("component", time.perf_counter() - start)
+            self.timers.add("component", time.perf_counter() - start)
+
+    # Resolve the dataStr of a fetched component, recording its timing and size
+    def resolveDataStr(self, compData):
+        result = self.result.component(compData["uuid"])
+        start = time.perf_counter()
+
+        dataStr = self.extractDataStr(compData)
 
-            debug("device info: " + json.dumps(dev_info.json(), indent=4))
+        result.addTiming("dataStr", time.perf_counter() - start)
 
-            device = dev_info.json()["result"]
-            fetched_devices[device["uuid"]] = device
+        if dataStr:
+            result.bytes += len(dataStr)
+        else:
+            result.fail("dataStr", self.dataStrErrors.get(compData["uuid"], "no dataStr in component"))
+
+        return dataStr
+
+    def downloadSymFp(self, components):
+        info(f"Fetching info...")
+
+        code_components, direct_uuids = self.splitComponents(components)
+
+        fetched_devices = {}
 
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            for dev_uuid in direct_uuids:
-                executor.submit(fetch_device_info, dev_uuid)
+        # Fetch UUIDs from code-based components
+        if code_components:
+            direct_uuids.extend(self.searchByCodes(code_components))
+
+        # Fetch device info by UUID
+        with concurrent.futures.ThreadPoolExecutor(self.max_workers, thread_name_prefix=WORKER_THREAD_NAME) as executor:
+            futures = {executor.submit(self.fetchDevice, dev_uuid): dev_uuid for dev_uuid in direct_uuids}
+
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    device = future.result()
+                    fetched_devices[device["uuid"]] = device
+                except Exception as e:
+                    error(f"Failed to fetch device {futures[future]}: {e}")
 
         # Collect symbol/footprint/3D model UUIDs to fetch
         fetched_symbols = {}
@@ -104,23 +591,66 @@ class ComponentLoader():
                 all_uuids.add(getUuidFirstPart(entry['attributes']['3D Model']))
                 uuid_to_obj_map[getUuidFirstPart(entry['attributes']['3D Model'])] = fetched_3dmodels
 
-        # Fetch symbols/footprints/3D models
-        def fetch_component(uuid):
-            url = f"https://pro.easyeda.com/api/v2/components/{uuid}"
-            r = self.session.get(url)
-            r.raise_for_status()
-            return r.json()["result"]
+        # Fetch symbols/footprints/3D models.
+        # dataStr blobs are resolved as soon as each component arrives,
+        # so blob downloads and decryption overlap with the remaining component fetches
+        data_str_futures = {}
 
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            futures = {executor.submit(fetch_component, uuid): uuid for uuid in all_uuids}
-            for future in concurrent.futures.as_completed(futures):
-                try:
-                    compData = future.result()
-                    debug(f"Fetched component {json.dumps(compData, indent=4)}")
+        with concurrent.futures.ThreadPoolExecutor(DATASTR_WORKERS, thread_name_prefix=WORKER_THREAD_NAME) as dsExecutor:
+            with concurrent.futures.ThreadPoolExecutor(self.max_workers, thread_name_prefix=WORKER_THREAD_NAME) as executor:
+                futures = {executor.submit(self.fetchComponent, uuid): uuid for uuid in all_uuids}
+                for future in concurrent.futures.as_completed(futures):
+                    try:
+                        compData = future.result()
 
-                    uuid_to_obj_map[compData["uuid"]][compData["uuid"]] = compData
-                except Exception as e:
-                    error(f"Failed to fetch component for uuid {futures[future]}: {e}")
+                        uuid_to_obj_map[compData["uuid"]][compData["uuid"]] = compData
+                        data_str_futures[compData["uuid"]] = dsExecutor.submit(self.resolveDataStr, compData)
+                    except Exception as e:
+                        error(f"Failed to fetch component for uuid {futures[future]}: {e}")
+
+            data_str = {uuid: future.result() for uuid, future in data_str_futures.items()}
+
+        libDeviceFile = self.writeLibrary(fetched_devices, fetched_symbols, fetched_footprints, fetched_3dmodels, data_str)
+        return libDeviceFile, fetched_3dmodels
+
+    # Check that the symbol and footprint of a device were fetched and resolved, and add their
+    # timings to the device result. Returns False if the device can't be added to the library.
+    def collectDeviceResult(self, device, fetched_symbols, fetched_footprints, data_str):
+        result = self.result.device(device["uuid"])
+        complete = True
+
+        for stage, attribute, fetched in (("symbol", "Symbol", fetched_symbols),
+                                          ("footprint", "Footprint", fetched_footprints),
+                                          ("model", "3D Model", None)):
+            uuid = getUuidFirstPart(device["attributes"].get(attribute))
+
+            if not uuid:
+                continue
+
+            compResult = self.result.component(uuid)
+
+            for name, seconds in compResult.timings.items():
+                result.addTiming(name, seconds)
+
+            result.bytes += compResult.bytes
+
+            if fetched is None:
+                # Devices without a model are still added to the library
+                if compResult.error:
+                    result.fail("model", compResult.error)
+            elif uuid not in fetched or not data_str.get(uuid):
+                result.fail(stage, compResult.error or f"{stage} {uuid} was not fetched")
+                complete = False
+
+        return complete
+
+    # Add fetched devices, symbols and footprints with their resolved dataStr to the library.
+    # Devices with a missing symbol or footprint are left out and reported as failed.
+    def writeLibrary(self, fetched_devices, fetched_symbols, fetched_footprints, fetched_3dmodels, data_str):
+        for dev_uuid, device in list(fetched_devices.items()):
+            if not self.collectDeviceResult(device, fetched_symbols, fetched_footprints, data_str):
+                warning(f"Device {device.get('product_code') or dev_uuid} is incomplete, not adding it to the library")
+                del fetched_devices[dev_uuid]
 
         # Set symbol/footprint type fields
         for device in fetched_devices.values():
@@ -136,7 +666,7 @@ class ComponentLoader():
 
         # Separate dataStr for footprints
         for f_uuid, f_data in fetched_footprints.items():
-            ds = self.extractDataStr(f_data)
+            ds = data_str.get(f_uuid)
             if ds:
                 footprint_data_str[f_uuid] = ds
 
@@ -144,218 +674,392 @@ class ComponentLoader():
 
         # Separate dataStr for symbols
         for s_uuid, s_data in fetched_symbols.items():
-            ds = self.extractDataStr(s_data)
+            ds = data_str.get(s_uuid)
             if ds:
                 symbol_data_str[s_uuid] = ds
 
             s_data.pop("dataStr", None) # Remove the dataStr field if exists
 
+        # Keep the resolved dataStr in 3D model entries, so model planning doesn't fetch it again
+        for m_uuid, m_data in fetched_3dmodels.items():
+            ds = data_str.get(m_uuid)
+            if ds:
+                m_data["dataStr"] = dataStrText(ds)
+
         libDeviceFile = {
             "devices": fetched_devices,
             "symbols": fetched_symbols,
             "footprints": fetched_footprints
         }
 
-        os.makedirs(self.target_path, exist_ok=True)
-
-        zip_filename = f"{self.target_path}/{self.target_name}.elibz"
-        merged_data = copy.deepcopy(libDeviceFile)
+        start = time.perf_counter()
 
         try:
-            if os.path.exists(zip_filename):
-                with zipfile.ZipFile(zip_filename, "r") as old_zip:
-                    for name in old_zip.namelist():
-                        if name == "device.json":
-                            old_data = json.loads(old_zip.read("device.json").decode("utf-8"))
-                            for entry_type in ["devices", "symbols", "footprints"]:
-                                for key in old_data[entry_type]:
-                                    if key not in merged_data[entry_type]:
-                                        merged_data[entry_type][key] = old_data[entry_type][key]
-                        if name.endswith('.esym'):
-                            symbol_uuid = os.path.splitext(os.path.basename(name))[0]
-                            if symbol_uuid not in symbol_data_str:
-                                symbol_data_str[symbol_uuid] = old_zip.read(name).decode('utf-8')
-                        elif name.endswith('.efoo'):
-                            footprint_uuid = os.path.splitext(os.path.basename(name))[0]
-                            if footprint_uuid not in footprint_data_str:
-                                footprint_data_str[footprint_uuid] = old_zip.read(name).decode('utf-8')
+            os.makedirs(self.target_path, exist_ok=True)
+
+            if self.shard_count:
+                library = ShardedLibrary(self.target_path, self.target_name, self.shard_count)
+                shards = library.write(libDeviceFile, symbol_data_str, footprint_data_str)
+                zip_filename = f"{self.target_path} (shards: {', '.join(shards)})"
+                written = [library.shardPath(shard) for shard in shards]
+            else:
+                zip_filename = f"{self.target_path}/{self.target_name}.elibz"
+                ElibzWriter(zip_filename).write(libDeviceFile, symbol_data_str, footprint_data_str)
+                written = [zip_filename]
         except Exception as e:
-            warning(f"Failed to merge device.json data, overwriting: {e}")
+            for dev_uuid in fetched_devices:
+                self.result.device(dev_uuid).fail("library", e)
+            raise
 
-        with zipfile.ZipFile(zip_filename, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-            zf.writestr("device.json", json.dumps(merged_data, indent=4))
-            for fp_uuid, ds in footprint_data_str.items():
-                zf.writestr(f"FOOTPRINT/{fp_uuid}.efoo", ds)
-            for sym_uuid, ds in symbol_data_str.items():
-                zf.writestr(f"SYMBOL/{sym_uuid}.esym", ds)
+        elapsed = time.perf_counter() - start
+        self.timers.add("library", elapsed, sum(os.path.getsize(path) for path in written))
+
+        for dev_uuid in fetched_devices:
+            self.result.device(dev_uuid).addTiming("library", elapsed)
+            self.journalUpdate(dev_uuid, "library", device=dev_uuid)
+
+        if self.journal:
+            self.journal.save()
 
         info( "*****************************" )
         info(f"Downloaded {len(fetched_devices)} devices, {len(fetched_symbols)} symbols, {len(fetched_footprints)} footprints and added to library: {zip_filename}")
-        return libDeviceFile, fetched_3dmodels
+
+        if self.missingCodes:
+            warning(f"{len(self.missingCodes)} parts were not found: {', '.join(self.missingCodes)}")
+
+        return libDeviceFile
 
     def downloadModels(self, libDeviceFile, fetched_3dmodels):
-        self.totalToDownload = 0
-        self.downloadedCounter = 0
-        self.statExisting = 0
-        self.statDownloaded = 0
-        self.statFailed = 0
+        self.resetModelStats()
 
         info( "*****************************" )
         info(f"Loading 3D models...")
         self.progress(0, 100)
 
-        uuidToTargetFileMap = {}
-        uuidsToTransform = {}
+        debug("fetched_3dmodels: %s", LazyJson(fetched_3dmodels))
+        debug("libDeviceFile: %s", LazyJson(libDeviceFile))
 
-        debug("fetched_3dmodels: " + json.dumps(fetched_3dmodels, indent=4))
-        debug("libDeviceFile: " + json.dumps(libDeviceFile, indent=4))
+        models = {}
 
-        for device in libDeviceFile["devices"].values():
-            try:
-                modelUuid = getUuidFirstPart(device["attributes"].get("3D Model"))
+        try:
+            for device in libDeviceFile["devices"].values():
+                model = self.planModel(device, fetched_3dmodels)
 
-                if not modelUuid or modelUuid not in fetched_3dmodels:
-                    info("No model for device '%s', footprint '%s'"
-                         % (device.get("product_code", device.get("uuid")), 
-                            device.get("footprint").get("display_title") if device.get("footprint") else "None"))
-                    continue
+                if model and model.directUuid in models:
+                    self.addModelDevice(models[model.directUuid], device["uuid"])
+                elif model:
+                    models[model.directUuid] = model
+        except KeyboardInterrupt:
+            return
 
-                modelTitle = device["attributes"]["3D Model Title"]
-                modelTransform = device["attributes"].get("3D Model Transform", "")
+        self.runModelTasks(list(models.values()))
+        self.printModelSummary(len(models))
 
-                dataStr = self.extractDataStr(fetched_3dmodels[modelUuid])
+    # Download models planned by an earlier run, from the job journal
+    def resumeModels(self, models):
+        self.resetModelStats()
 
-                if dataStr:
-                    directUuid = json.loads(dataStr)["model"]
-                else:
-                    info("Unable to extract model for device '%s', footprint '%s'"
-                         % (device.get("product_code", device.get("uuid")), 
-                            device.get("footprint").get("display_title") if device.get("footprint") else "None"))
-                    continue
+        info( "*****************************" )
+        info(f"Resuming {len(models)} 3D models...")
+        self.progress(0, 100)
+
+        self.runModelTasks(models)
+        self.printModelSummary(len(models))
+
+    def runModelTasks(self, models):
+        with self.createFixupExecutor() as texecutor:
+            with concurrent.futures.ThreadPoolExecutor(self.max_workers or STEP_DOWNLOAD_WORKERS, thread_name_prefix=WORKER_THREAD_NAME) as dexecutor:
+                def downloadStep(model):
+                    try:
+                        if self.downloadModel(model):
+                            self.submitFixup(texecutor, model)
+                    except Exception as e:
+                        traceback.print_exc()
+                        error( "Error processing model '%s': %s" % (model.directUuid, str(e)) )
+                        self.modelFailed(model, "model", e)
 
-                uuidsToTransform[directUuid] = [float(x) for x in modelTransform.split(",")]
+                self.modelStats.addTotal(len(models))
 
-                easyEdaFilename = os.path.join(self.kiprjmod, MODELS_DIR, modelTitle + ".step")
-                easyEdaFilename = os.path.normpath(easyEdaFilename)
+                for _ in dexecutor.map(downloadStep, models):
+                    pass
 
-                uuidToTargetFileMap[directUuid] = easyEdaFilename
-            except KeyboardInterrupt:
-                return
-            except Exception as e:
-                traceback.print_exc()
-                info("Cannot get model for device '%s': %s" % (device.get("product_code", device.get("uuid")), str(e)))
-                continue
+    def resetModelStats(self):
+        self.modelStats = ModelMetrics(self.progress)
+        self.targetFileToUuid = {}
+
+    def printModelSummary(self, modelCount):
+        info( "" )
+        info( "*****************************" )
+        info( "          All done.          " )
+        info( "*****************************" )
+        info( "" )
+        info( "Total model count: %d" % modelCount )
+        info( "STEP models downloaded: %d" % self.modelStats.get("downloaded") )
+        info( "Already existing models: %d" % self.modelStats.get("existing") )
+        if self.model_store:
+            info( "Models from the shared store: %d" % self.modelStats.get("store") )
+        info( "Failed downloads: %d" % self.modelStats.get("failed") )
+
+        modelRate, mbRate = self.modelStats.rates()
+        info( "Throughput: %.1f models/s, %.2f MB/s in %.1f s" % (modelRate, mbRate, self.modelStats.elapsed()) )
+        self.progress(100, 100)
+
+    # Find the STEP model of a device and its target file. Returns a ModelTask, or None if the device has no model.
+    def planModel(self, device, fetched_3dmodels):
+        try:
+            modelUuid = getUuidFirstPart(device["attributes"].get("3D Model"))
+
+            if not modelUuid or modelUuid not in fetched_3dmodels:
+                info("No model for device '%s', footprint '%s'"
+                     % (device.get("product_code", device.get("uuid")), 
+                        device.get("footprint").get("display_title") if device.get("footprint") else "None"))
+
+                if not modelUuid:
+                    self.journalUpdate(device["uuid"], "model")
+                return None
+
+            modelTitle = device["attributes"]["3D Model Title"]
+            modelTransform = device["attributes"].get("3D Model Transform", "")
+
+            dataStr = self.extractDataStr(fetched_3dmodels[modelUuid])
+
+            if dataStr:
+                directUuid = json.loads(dataStr)["model"]
+            else:
+                info("Unable to extract model for device '%s', footprint '%s'"
+                     % (device.get("product_code", device.get("uuid")), 
+                        device.get("footprint").get("display_title") if device.get("footprint") else "None"))
+                return None
+
+            transform = [float(x) for x in modelTransform.split(",")]
+
+            easyEdaFilename = os.path.join(self.kiprjmod, MODELS_DIR, modelTitle + ".step")
+            easyEdaFilename = os.path.normpath(easyEdaFilename)
+
+            # KiCad finds models by their title, so a title can only have one model file
+            otherUuid = self.targetFileToUuid.setdefault(easyEdaFilename, directUuid)
+
+            if otherUuid != directUuid:
+                warning("Device '%s' uses 3D model %s, but model %s has the same title '%s'. Only the file of the first one is kept."
+                        % (device.get("product_code", device.get("uuid")), directUuid, otherUuid, modelTitle))
+                self.journalUpdate(device["uuid"], "model")
+                return None
+
+            model = ModelTask(directUuid, easyEdaFilename, transform, modelKey(directUuid, modelTransform), device["uuid"])
+            self.journalUpdate(device["uuid"], model=model.toJournal(self.kiprjmod))
+
+            return model
+        except Exception as e:
+            traceback.print_exc()
+            info("Cannot get model for device '%s': %s" % (device.get("product_code", device.get("uuid")), str(e)))
+            self.result.device(device["uuid"]).fail("model", e)
+            return None
 
-        with concurrent.futures.ThreadPoolExecutor(1) as texecutor:
-            def fixupModel(fixTaskArgs):
-                directUuid, kfilePath = fixTaskArgs
+    # Record a failed model download or conversion for all devices that use the model
+    def modelFailed(self, model, stage, err):
+        model.failure = (stage, str(err))
 
-                file_name = os.path.splitext( os.path.basename( kfilePath ) ) [0]
+        for dev_uuid in model.devUuids:
+            self.result.device(dev_uuid).fail(stage, err)
+
+    # Record a placed or converted model for all devices that use the model
+    def modelDone(self, model):
+        if not self.journal:
+            return
+
+        for dev_uuid in model.devUuids:
+            self.journalUpdate(dev_uuid, "model")
+
+        self.journal.save(force=False)
+
+    # Add a device to a model planned for another device
+    def addModelDevice(self, model, devUuid):
+        model.devUuids.append(devUuid)
+
+        if model.failure:
+            self.result.device(devUuid).fail(*model.failure)
+
+    # Place the model file in the project, from the model store or by downloading it.
+    # Returns True if the downloaded model needs to be converted.
+    def downloadModel(self, model):
+        kfilePath = model.kfilePath
+        file_name = os.path.splitext( os.path.basename( kfilePath ) ) [0]
+        needsFixup = False
+        start = time.perf_counter()
+
+        try:
+            if os.path.exists(kfilePath):
+                info("Skipping '%s': STEP model file already exists." % (file_name))
+                self.modelStats.count("existing")
+            elif self.model_store and self.fetchFromStore(model):
+                debug("Using '%s' from the model store." % (file_name))
+                self.modelStats.count("store")
+            else:
                 jfilePath = kfilePath + "_jlc"
+                url = self.step_url_format.format(uuid=model.directUuid)
 
-                debug( "Loading STEP model %s" % (file_name) )
-                model: UTILS_STEP_MODEL = UTILS_STEP_MODEL.LoadSTEP(jfilePath)
+                os.makedirs(os.path.dirname(kfilePath), exist_ok=True)
 
-                if not model:
-                    error( "Error loading model '%s'" % (file_name) )
-                    return
-                
-                debug( "Converting STEP model '%s'" % (file_name) )
-                bbox: UTILS_BOX3D = model.GetBoundingBox()
+                # A verified download from an interrupted run is converted without downloading it again
+                if os.path.isfile(jfilePath) and not verifyStepFile(jfilePath):
+                    debug("Reusing downloaded '%s'." % (file_name))
+                else:
+                    debug("Downloading '%s'" % (file_name))
+                    debug("'%s' from '%s'" % (file_name, url))
 
-                try:
-                    if directUuid in uuidsToTransform:
-                        # Convert mils to mm
-                        fitXmm = uuidsToTransform[directUuid][0] / 39.37
-                        fitYmm = uuidsToTransform[directUuid][1] / 39.37
-
-                        bsize: VECTOR3D = bbox.GetSize()
-                        scaleFactorX = fitXmm / bsize.x;
-                        scaleFactorY = fitYmm / bsize.y;
-                        scaleFactor = ( scaleFactorX + scaleFactorY ) / 2
-
-                        debug( "Dimensions %f %f factors %f %f avg %f model '%s'" %
-                            (fitXmm, fitYmm, scaleFactorX, scaleFactorY, scaleFactor, file_name) )
-
-                        if abs( scaleFactorX - scaleFactorY ) > 0.1:
-                            warning( "Scale factors do not match: X %.3f; Y %.3f for model '%s'." %
-                                (scaleFactorX, scaleFactorY, file_name) )
-                            warning( "**** The model '%s' might be misoriented! ****" % (file_name) )
-                        elif abs( scaleFactor - 1.0 ) > 0.01:
-                            warning( "Scaling '%s' by %f" % (file_name, scaleFactor) )
-                            model.Scale( scaleFactor );
-                        else:
-                            debug( "No scaling for %s" % (file_name) )
+                    downloadStart = time.perf_counter()
+                    self.downloadStepFile(url, jfilePath)
 
-                except Exception as e:
-                    traceback.print_exc()
-                    error( "Error scaling model '%s': %s" % (file_name, str(e)) )
-                    return
+                    debug("Downloaded '%s'." % (file_name))
+                    size = os.path.getsize(jfilePath)
+                    self.modelStats.count("downloaded", size)
+                    self.timers.add("step download", time.perf_counter() - downloadStart, size)
+
+                    for dev_uuid in model.devUuids:
+                        self.result.device(dev_uuid).bytes += size
+
+                if self.fixup_models:
+                    needsFixup = True
+                else:
+                    info("Downloaded '%s' without conversion." % (file_name))
+
+        except Exception as e:
+            warning("Failed to download model '%s': %s" % (file_name, str(e)))
+            self.modelStats.count("failed")
+            self.modelFailed(model, "model", e)
+
+        for dev_uuid in model.devUuids:
+            self.result.device(dev_uuid).addTiming("model", time.perf_counter() - start)
+
+        if not needsFixup and not model.failure:
+            self.modelDone(model)
+
+        self.modelStats.complete()
+
+        return needsFixup
+
+    def fetchFromStore(self, model):
+        with self.timers.time("model store"):
+            return self.model_store.fetch(model.storeKey, model.kfilePath)
+
+    # Convert a downloaded model in the fixup executor. If the executor is broken, e.g. after a
+    # worker process crashed, the model fails and its <name>.step_jlc is converted by a later run.
+    def submitFixup(self, executor, model):
+        try:
+            future = executor.submit(timedFixupStepModel, model.kfilePath + "_jlc", model.kfilePath, model.transform)
+        except Exception as e:
+            file_name = os.path.splitext( os.path.basename( model.kfilePath ) ) [0]
+            error( "Cannot convert model '%s': %s" % (file_name, str(e)) )
+            self.modelFailed(model, "fixup", e)
+            return
+
+        future.add_done_callback(lambda f: self.fixupDone(model, f))
+
+    # Download a STEP model to jfilePath. Data is written to a .part file first, which is resumed
+    # with an HTTP Range request if an earlier download was interrupted. The .part file is renamed
+    # to jfilePath only after its size and contents are verified.
+    def downloadStepFile(self, url, jfilePath):
+        partPath = jfilePath + ".part"
+        offset = os.path.getsize(partPath) if os.path.isfile(partPath) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+        with self.session.get(url, stream=True, timeout=STEP_DOWNLOAD_TIMEOUT, headers=headers) as resp:
+            if offset and resp.status_code == 416:
+                # The partial file doesn't match the model anymore
+                resp.close()
+                os.remove(partPath)
+                return self.downloadStepFile(url, jfilePath)
+
+            resp.raise_for_status()
+
+            expectedSize = None
+            rangeStart = 0
+
+            if resp.status_code == 206:
+                # Content-Range: bytes <start>-<end>/<total>
+                contentRange = resp.headers.get("Content-Range", "")
+                rangeSpec, _, total = contentRange.partition("/")
+                rangeStart = int(rangeSpec.split()[-1].split("-")[0]) if rangeSpec else 0
+                expectedSize = int(total) if total.isdigit() else None
+
+                if rangeStart != offset:
+                    raise Exception(f"Unexpected range in response: {contentRange}")
+
+                debug(f"Resuming download of {os.path.basename(jfilePath)} at {offset} bytes")
+            elif "Content-Length" in resp.headers and not resp.headers.get("Content-Encoding"):
+                expectedSize = int(resp.headers["Content-Length"])
 
-                newbbox          = model.GetBoundingBox()
-                center: VECTOR3D = newbbox.GetCenter()
+            with open(partPath, "ab" if rangeStart else "wb") as f:
+                for chunk in resp.iter_content(STEP_CHUNK_SIZE):
+                    f.write(chunk)
 
-                model.Translate( -center.x, -center.y, -newbbox.Min().z )
+        size = os.path.getsize(partPath)
 
-                debug( "Saving STEP model %s" % (file_name) )
-                model.SaveSTEP( kfilePath )
+        # Keep the partial file, so the next attempt can resume it
+        if expectedSize is not None and size != expectedSize:
+            raise Exception(f"Incomplete download: {size} of {expectedSize} bytes")
+
+        problem = verifyStepFile(partPath)
+        if problem:
+            os.remove(partPath)
+            raise Exception(f"Invalid STEP data: {problem}")
+
+        os.replace(partPath, jfilePath)
+
+    # Create the executor for STEP model fixup. With fixup_processes, models are converted
+    # in a pool of worker processes, if pcbnew can be imported there.
+    def createFixupExecutor(self):
+        if self.fixup_models and self.fixup_processes > 0:
+            try:
+                python = findPythonExecutable()
+
+                if not python:
+                    raise Exception("Python interpreter not found")
+
+                ctx = multiprocessing.get_context("spawn")
+
+                if python != sys.executable:
+                    ctx.set_executable(python)
+
+                executor = concurrent.futures.ProcessPoolExecutor(self.fixup_processes, mp_context=ctx)
 
-                # Delete the temporary JLC file after successful conversion
                 try:
-                    if os.path.exists(jfilePath):
-                        os.remove(jfilePath)
-                        debug(f"Deleted temporary file {jfilePath}")
-                except Exception as e:
-                    info(f"Failed to delete temporary file {jfilePath}: {str(e)}")
+                    if not executor.submit(probePcbnew).result(timeout=FIXUP_PROBE_TIMEOUT):
+                        raise Exception("pcbnew does not support STEP models")
+                except Exception:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    raise
+
+                debug(f"Converting STEP models in {self.fixup_processes} processes")
+                return executor
+            except Exception as e:
+                warning(f"Cannot convert STEP models in worker processes, converting in-process: {e}")
 
-            with concurrent.futures.ThreadPoolExecutor(8) as dexecutor: 
-                def downloadStep(dnlTaskArgs):
-                    directUuid, kfilePath = dnlTaskArgs
-                    file_name = os.path.splitext( os.path.basename( kfilePath ) ) [0]
+        return concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix=WORKER_THREAD_NAME)
 
-                    try:
-                        if not os.path.exists(kfilePath):
-                            stepUrlFormat = "https://modules.easyeda.com/qAxj6KHrDKw4blvCG8QJPs7Y/{uuid}"
-                            jfilePath = kfilePath + "_jlc"
-                            url = stepUrlFormat.format(uuid=directUuid)
-
-                            debug("Downloading '%s'" % (file_name))
-                            debug("'%s' from '%s'" % (file_name, url))
-                            os.makedirs(os.path.dirname(kfilePath), exist_ok=True)
-                            urllib.request.urlretrieve(url, jfilePath)
-
-                            if os.path.isfile(jfilePath):
-                                debug("Downloaded '%s'." % (file_name))
-                                self.statDownloaded += 1
-
-                                fixTaskArgs = [directUuid, kfilePath]
-                                texecutor.submit(fixupModel, fixTaskArgs)
-                            else:
-                                warning( "Path '%s' is not a file." % jfilePath )
-                        else:
-                            info("Skipping '%s': STEP model file already exists." % (file_name))
-                            self.statExisting += 1
+    def fixupDone(self, model: ModelTask, future: concurrent.futures.Future):
+        file_name = os.path.splitext( os.path.basename( model.kfilePath ) ) [0]
 
-                    except Exception as e:
-                        warning("Failed to download model '%s': %s" % (file_name, str(e)))
-                        self.statFailed += 1
+        try:
+            success, records, seconds = future.result()
+        except Exception as e:
+            error( "Error converting model '%s': %s" % (file_name, str(e)) )
+            self.modelFailed(model, "fixup", e)
+            return
 
-                    self.downloadedCounter += 1
-                    self.progress(self.downloadedCounter, self.totalToDownload)
+        self.timers.add("fixup", seconds)
 
-                self.totalToDownload = len(uuidToTargetFileMap)
-                dexecutor.map(downloadStep, uuidToTargetFileMap.items())
+        for level, msg in records:
+            log(level, msg)
 
-        info( "" )
-        info( "*****************************" )
-        info( "          All done.          " )
-        info( "*****************************" )
-        info( "" )
-        info( "Total model count: %d" % len(uuidToTargetFileMap) )
-        info( "STEP models downloaded: %d" % self.statDownloaded )
-        info( "Already existing models: %d" % self.statExisting )
-        info( "Failed downloads: %d" % self.statFailed )
-        self.progress(100, 100)
+        if not success:
+            self.modelFailed(model, "fixup", f"cannot convert model '{file_name}'")
+            return
+
+        if self.model_store and model.storeKey:
+            self.model_store.add(model.storeKey, model.kfilePath)
+
+        self.modelDone(model)
 
     # Extract dataStr from component data. If dataStr is not available, try to decrypt and decompress the data from dataStrId URL.
     def extractDataStr(self, component_data):
@@ -374,21 +1078,48 @@ class ComponentLoader():
                 keyHex = component_data.get("key")
                 ivHex = component_data.get("iv")
 
-                debug("dataStrId key: " + keyHex)
-                debug("dataStrId iv: " + ivHex)
-                
+                debug("dataStrId key: %s", keyHex)
+                debug("dataStrId iv: %s", ivHex)
+
+                cacheKey = dataStrKey(dataStrId, keyHex, ivHex)
+
+                if self.datastr_cache:
+                    start = time.perf_counter()
+                    cached = self.datastr_cache.get(cacheKey)
+
+                    if cached is not None:
+                        debug(f"dataStr cache hit: {component_data.get('uuid')}")
+                        self.timers.add("dataStr cache", time.perf_counter() - start, len(cached))
+                        return cached
+
+                start = time.perf_counter()
+
                 dataStrResp = self.session.get(dataStrId)
                 dataStrResp.raise_for_status()
 
-                debug("dataStrId encrypted content: " + dataStrResp.content.hex())
+                self.timers.add("dataStr", time.perf_counter() - start, len(dataStrResp.content))
+
+                debugResponse(self.dumper, "dataStrId encrypted content", "dataStr", component_data.get("uuid"), dataStrResp.content)
                 
                 from . import decryptor
-                decryptedStr = decryptor.decryptDataStrIdData(dataStrResp.content, keyHex, ivHex)
+                start = time.perf_counter()
+
+                # Kept as UTF-8 bytes, which are stored in the .elibz as they are
+                decrypted = decryptor.decryptDataStrIdBytes(dataStrResp.content, keyHex, ivHex)
+
+                self.timers.add("decrypt", time.perf_counter() - start, len(decrypted))
+
+                if self.datastr_cache:
+                    self.datastr_cache.put(cacheKey, decrypted)
 
-                debug("dataStrId decrypted content: " + decryptedStr)
+                if self.dumper:
+                    self.dumper.dump("dataStr", component_data.get("uuid"), decrypted.decode("utf-8", "replace"))
+                elif debugEnabled():
+                    debug("dataStrId decrypted content: %s", decrypted.decode("utf-8", "replace"))
 
-                return decryptedStr
+                return decrypted
             except Exception as e:
                 info(f"Failed to fetch/decrypt dataStrId: {e}")
+                self.dataStrErrors[component_data.get("uuid")] = f"failed to fetch/decrypt dataStrId: {e}"
                 
         return None
\ No newline at end of file
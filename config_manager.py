@@ -47,6 +47,105 @@ class ConfigManager:
         self.config.set('Library', 'name', name)
         self.save_config()
 
+    def get_shard_count(self, default=0):
+        """Get the number of .elibz shards the library is split into (0 for a single file)"""
+        return self.config.getint('Library', 'shards', fallback=default)
+
+    def get_search_page_size(self, default=50):
+        """Get the number of results per search page"""
+        return self.config.getint('Search', 'page_size', fallback=default)
+
+    def get_search_batch_size(self, default=50):
+        """Get the number of part codes sent per search request"""
+        return self.config.getint('Download', 'search_batch_size', fallback=default)
+
+    def get_parallel_fixup(self):
+        """Get whether STEP models are converted in a pool of worker processes"""
+        return self.config.getboolean('Download', 'parallel_fixup', fallback=False)
+
+    def get_model_store_enabled(self):
+        """Get whether converted STEP models are shared between projects"""
+        return self.config.getboolean('Models', 'shared_store', fallback=True)
+
+    def get_model_store_max_size_mb(self, default=2048):
+        """Get the shared STEP model store size limit in megabytes"""
+        return self.config.getint('Models', 'store_max_size_mb', fallback=default)
+
+    def get_download_engine(self):
+        """Get the download engine, either threads or asyncio"""
+        return self.config.get('Download', 'engine', fallback="threads")
+
+    def get_force_refresh(self):
+        """Get whether parts already in the library are downloaded again"""
+        return self.config.getboolean('Download', 'force_refresh', fallback=False)
+
+    def get_dump_dir(self):
+        """Get the directory to write raw API responses to, or None"""
+        return self.config.get('Debug', 'dump_dir', fallback=None) or None
+
+    def get_log_max_lines(self, default=5000):
+        """Get the number of lines kept in the log window"""
+        return self.config.getint('Log', 'max_lines', fallback=default)
+
+    def get_log_file_enabled(self):
+        """Get whether the full log is also written to a rotating file"""
+        return self.config.getboolean('Log', 'file', fallback=False)
+
+    def get_log_file_max_size_mb(self, default=10):
+        """Get the size of a log file in megabytes, before it is rotated"""
+        return self.config.getint('Log', 'file_max_size_mb', fallback=default)
+
+    def get_log_file_backup_count(self, default=3):
+        """Get the number of rotated log files to keep"""
+        return self.config.getint('Log', 'file_backup_count', fallback=default)
+
+    def get_host_limits(self):
+        """Get per-host request concurrency limits
+        
+        Entries in the [RateLimit] section look like: pro.easyeda.com = 8, 1, 32
+        (initial, minimum and maximum number of concurrent requests).
+        
+        Returns:
+            Dict of host name to (initial, minimum, maximum)
+        """
+        limits = {}
+        
+        if not self.config.has_section('RateLimit'):
+            return limits
+        
+        for host, value in self.config.items('RateLimit'):
+            try:
+                initial, minimum, maximum = (int(x) for x in value.split(","))
+                limits[host] = (initial, minimum, maximum)
+            except ValueError:
+                warning(f"Invalid rate limit for {host}: {value}")
+        
+        return limits
+
+    def get_cache_offline(self):
+        """Get whether the response cache is used in offline (cache-only) mode"""
+        return self.config.getboolean('Cache', 'offline', fallback=False)
+
+    def get_cache_max_size_mb(self, default=256):
+        """Get the response cache size limit in megabytes"""
+        return self.config.getint('Cache', 'max_size_mb', fallback=default)
+
+    def get_cache_ttl_hours(self, default=168):
+        """Get the time after which cached responses are revalidated"""
+        return self.config.getfloat('Cache', 'ttl_hours', fallback=default)
+
+    def get_datastr_cache_enabled(self):
+        """Get whether decrypted symbol and footprint data is cached"""
+        return self.config.getboolean('Cache', 'datastr', fallback=True)
+
+    def get_datastr_cache_max_size_mb(self, default=128):
+        """Get the decrypted data cache size limit in megabytes"""
+        return self.config.getint('Cache', 'datastr_max_size_mb', fallback=default)
+
+    def get_datastr_cache_memory_entries(self, default=256):
+        """Get the number of decrypted data entries kept in memory"""
+        return self.config.getint('Cache', 'datastr_memory_entries', fallback=default)
+
 
 class LibraryTableManager:
     """Manages KiCad symbol and footprint library tables"""
@@ -82,25 +181,28 @@ class LibraryTableManager:
             warning(f"Failed to read {lib_type} library table: {e}")
             return False
     
-    def add_library_to_table(self, lib_name, lib_path, lib_type="symbol"):
+    def add_library_to_table(self, lib_name, lib_path, lib_type="symbol", lib_dir=None):
         """Add a library to the library table
         
         Args:
             lib_name: Name of the library
             lib_path: Path to the library file (relative to project)
             lib_type: Either "symbol" or "footprint"
+            lib_dir: Directory of the .elibz file in the project, defaults to lib_name
         
         Returns:
             True if successful, False otherwise
         """
         table_path = self.sym_lib_table_path if lib_type == "symbol" else self.fp_lib_table_path
         
+        lib_dir = lib_dir or lib_name
+
         # Determine the library entry format for EasyEDA library
         # Both symbol and footprint libraries use the same .elibz file
         if lib_type == "symbol":
-            lib_entry = f'  (lib (name "{lib_name}")(type "EasyEDA (JLCEDA) Pro")(uri "${{KIPRJMOD}}/{lib_name}/{lib_name}.elibz")(options "")(descr ""))\n'
+            lib_entry = f'  (lib (name "{lib_name}")(type "EasyEDA (JLCEDA) Pro")(uri "${{KIPRJMOD}}/{lib_dir}/{lib_name}.elibz")(options "")(descr ""))\n'
         else:
-            lib_entry = f'  (lib (name "{lib_name}")(type "EasyEDA / JLCEDA Pro")(uri "${{KIPRJMOD}}/{lib_name}/{lib_name}.elibz")(options "")(descr ""))\n'
+            lib_entry = f'  (lib (name "{lib_name}")(type "EasyEDA / JLCEDA Pro")(uri "${{KIPRJMOD}}/{lib_dir}/{lib_name}.elibz")(options "")(descr ""))\n'
         
         try:
             # Create table if it doesn't exist
@@ -140,6 +242,28 @@ class LibraryTableManager:
             error(f"Failed to add library to {lib_type} table: {e}")
             return False
     
+    def register_shards(self, lib_name, shard_names):
+        """Add library shards that are missing from the symbol and footprint tables
+        
+        Args:
+            lib_name: Name of the sharded library, which is also its directory
+            shard_names: Names of the shard libraries
+        
+        Returns:
+            Number of table entries added
+        """
+        added = 0
+        
+        for shard in shard_names:
+            for lib_type in ("symbol", "footprint"):
+                if self.check_library_exists(shard, lib_type):
+                    continue
+                
+                if self.add_library_to_table(shard, None, lib_type, lib_dir=lib_name):
+                    added += 1
+        
+        return added
+    
     def prompt_add_library(self, parent, lib_name, lib_path):
         """Prompt user to add library to symbol and footprint tables
         
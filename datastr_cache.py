@@ -0,0 +1,53 @@
+import zlib
+
+from logging import info, warning, debug, error
+
+from .http_cache import DiskLRU, MemoryLRU, getUserCacheDir
+
+DEFAULT_DATASTR_CACHE_SIZE = 128 * 1024 * 1024
+DEFAULT_DATASTR_MEMORY_ENTRIES = 256
+
+
+def dataStrKey(dataStrId, key_hex, iv_hex):
+    return f"{dataStrId}|{key_hex}|{iv_hex}"
+
+
+class DataStrCache(DiskLRU):
+    """Per-user cache of decrypted and decompressed dataStrId blobs, shared between projects.
+
+    Entries are keyed by the blob URL with its key and IV, and stored zlib-compressed.
+    The most recently used payloads are also kept in memory.
+    """
+
+    def __init__(self, root=None, max_size=DEFAULT_DATASTR_CACHE_SIZE, memory_entries=DEFAULT_DATASTR_MEMORY_ENTRIES):
+        super().__init__(root or getUserCacheDir("datastr"), max_size)
+        self.memory = MemoryLRU(memory_entries)
+
+    def get(self, key):
+        """Returns the cached payload bytes, or None"""
+        data = self.memory.get(key)
+        if data is not None:
+            return data
+
+        path = self.entryPath(key, ".z")
+
+        try:
+            with open(path, "rb") as f:
+                data = zlib.decompress(f.read())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            warning(f"Ignoring corrupted dataStr cache entry {path}: {e}")
+            return None
+
+        self.touch(path)
+        self.memory.put(key, data)
+        return data
+
+    def put(self, key, data: bytes):
+        self.memory.put(key, data)
+
+        try:
+            self.storeFile(self.entryPath(key, ".z"), zlib.compress(data))
+        except Exception as e:
+            warning(f"Failed to write dataStr cache entry: {e}")
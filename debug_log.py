@@ -0,0 +1,90 @@
+import os
+import re
+import json
+import logging
+import threading
+
+from logging import info, warning, debug, error
+
+# Directory to write raw API responses to, instead of logging them
+DUMP_DIR_ENV = "JLC_KICAD_DUMP_DIR"
+
+
+class LazyJson:
+    """Serializes an object when formatted, so debug("%s", LazyJson(obj)) costs nothing
+    unless debug logging is enabled."""
+
+    def __init__(self, obj, indent=4):
+        self.obj = obj
+        self.indent = indent
+
+    def __str__(self):
+        return json.dumps(self.obj, indent=self.indent)
+
+
+class LazyHex:
+    """Hex dump of binary data, built only when formatted"""
+
+    def __init__(self, data):
+        self.data = data
+
+    def __str__(self):
+        return bytes(self.data).hex()
+
+
+def debugEnabled():
+    return logging.getLogger().isEnabledFor(logging.DEBUG)
+
+
+class ResponseDumper:
+    """Writes raw API responses to <root>/<kind>/<key>.<ext>"""
+
+    def __init__(self, root):
+        self.root = root
+        self.lock = threading.Lock()
+        self.counter = 0
+
+    def dump(self, kind, key, data):
+        """Writes data (bytes, str or a JSON object) to a file. Returns the file path."""
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            ext, content = "bin", bytes(data)
+        elif isinstance(data, str):
+            ext, content = "txt", data.encode("utf-8")
+        else:
+            ext, content = "json", json.dumps(data, indent=4).encode("utf-8")
+
+        with self.lock:
+            self.counter += 1
+            counter = self.counter
+
+        name = re.sub(r"[^\w.-]", "_", str(key))[:100] or str(counter)
+        path = os.path.join(self.root, kind, f"{name}.{ext}")
+
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            with open(path, "wb") as f:
+                f.write(content)
+        except OSError as e:
+            warning(f"Failed to write response dump {path}: {e}")
+
+        return path
+
+
+def createDumper(dump_dir=None):
+    """Returns a ResponseDumper for dump_dir or the JLC_KICAD_DUMP_DIR environment variable, or None"""
+    dump_dir = dump_dir or os.getenv(DUMP_DIR_ENV)
+
+    if not dump_dir:
+        return None
+
+    info(f"Writing raw API responses to {dump_dir}")
+    return ResponseDumper(dump_dir)
+
+
+def debugResponse(dumper, label, kind, key, data):
+    """Logs an API response at debug level, or writes it to a file in dump mode"""
+    if dumper:
+        debug("%s: written to %s", label, dumper.dump(kind, key, data))
+    elif debugEnabled():
+        debug("%s: %s", label, LazyHex(data) if isinstance(data, (bytes, bytearray, memoryview)) else LazyJson(data))
@@ -1,5 +1,4 @@
-import gzip
-import io
+import zlib
 import platform
 
 try:
@@ -10,24 +9,64 @@ except ImportError:
     else:
         raise Exception("Please install PyCryptodome using: pip install pycryptodome")
 
+# In AES-GCM, typically the last 16 bytes are the authentication tag
+TAG_SIZE = 16
+
+# Ciphertext bytes decrypted and decompressed at a time
+CHUNK_SIZE = 64 * 1024
+
+# zlib window bits for gzip-wrapped data
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def iterDataStrIdData(encoded_data, key_hex, iv_hex, chunk_size=CHUNK_SIZE):
+    """Decrypts and gunzips a dataStrId blob in chunks, yielding decompressed bytes.
+
+    The ciphertext is read through memoryview slices and decrypted into one reused
+    buffer, so only the decompressed output is allocated. The tag is verified after
+    the last chunk: if the generator raises, the data yielded so far must be discarded.
+    """
+    cipher = AES.new(bytes.fromhex(key_hex), AES.MODE_GCM, nonce=bytes.fromhex(iv_hex))
+
+    data = memoryview(encoded_data)
+    if len(data) < TAG_SIZE:
+        raise ValueError("dataStrId data is shorter than the authentication tag")
+
+    ciphertext = data[:-TAG_SIZE]
+    tag = data[-TAG_SIZE:]
+
+    buffer = memoryview(bytearray(min(chunk_size, len(ciphertext))))
+    decompressor = zlib.decompressobj(GZIP_WBITS)
+
+    for offset in range(0, len(ciphertext), chunk_size):
+        chunk = ciphertext[offset:offset + chunk_size]
+        plaintext = buffer[:len(chunk)]
+        cipher.decrypt(chunk, output=plaintext)
+
+        while plaintext:
+            out = decompressor.decompress(plaintext)
+            if out:
+                yield out
+
+            # A gzip stream can have several members, like gzip.GzipFile reads
+            plaintext = decompressor.unused_data
+            if plaintext:
+                decompressor = zlib.decompressobj(GZIP_WBITS)
+
+    cipher.verify(tag)
+
+    out = decompressor.flush()
+    if out:
+        yield out
+
+    if not decompressor.eof and len(ciphertext):
+        raise ValueError("dataStrId data ends in the middle of the gzip stream")
+
+
+def decryptDataStrIdBytes(encoded_data, key_hex, iv_hex):
+    """Returns the decrypted and decompressed dataStrId data as UTF-8 bytes, ready to be stored in an .elibz"""
+    return b"".join(iterDataStrIdData(encoded_data, key_hex, iv_hex))
+
+
 def decryptDataStrIdData(encoded_data, key_hex, iv_hex):
-    # Convert hex strings to bytes
-    key = bytes.fromhex(key_hex)
-    iv = bytes.fromhex(iv_hex)
-    
-    # Create AES-GCM cipher
-    cipher = AES.new(key, AES.MODE_GCM, nonce=iv)
-    
-    # In AES-GCM, typically the last 16 bytes are the authentication tag
-    tag = encoded_data[-16:]
-    actual_ciphertext = encoded_data[:-16]
-    
-    # Decrypt data
-    plaintext = cipher.decrypt_and_verify(actual_ciphertext, tag)
-    
-    # Decompress with gzip
-    with io.BytesIO(plaintext) as compressed_data:
-        with gzip.GzipFile(fileobj=compressed_data, mode='rb') as f:
-            decompressed_data = f.read()
-    
-    return decompressed_data.decode('utf-8')
\ No newline at end of file
+    return decryptDataStrIdBytes(encoded_data, key_hex, iv_hex).decode('utf-8')
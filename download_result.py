@@ -0,0 +1,131 @@
+import threading
+
+from logging import info, warning
+
+STATUS_PENDING = "pending"
+STATUS_OK = "ok"
+STATUS_FAILED = "failed"
+STATUS_SKIPPED = "skipped" # Already downloaded by an earlier run
+
+
+class PartResult:
+    """Outcome of downloading one requested part (C-code or device UUID)"""
+
+    def __init__(self, part):
+        self.part = part
+        self.device_uuid = None
+        self.status = STATUS_PENDING
+        self.failed_stage = None
+        self.error = None
+        self.timings = {} # Stage name to seconds
+        self.bytes = 0
+
+    def fail(self, stage, err):
+        # Keep the first failure, later stages usually fail because of it
+        if self.status != STATUS_FAILED:
+            self.status = STATUS_FAILED
+            self.failed_stage = stage
+            self.error = str(err)
+
+    def skip(self):
+        self.status = STATUS_SKIPPED
+
+    def addTiming(self, stage, seconds):
+        self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+
+    def __repr__(self):
+        return f"PartResult({self.part!r}, {self.status}, stage={self.failed_stage!r}, error={self.error!r})"
+
+
+class DownloadResult:
+    """Per-part results of a ComponentLoader.downloadAll run.
+
+    Parts are looked up by the requested code or UUID, or by device UUID once
+    the device is known. A run can partially succeed: failed() lists the parts
+    that need a retry.
+    """
+
+    def __init__(self, parts=()):
+        self.parts = {}
+        self.byDevice = {}
+        self.components = {} # Symbols, footprints and models, shared between devices
+        self.error = None # Set if the run failed as a whole
+        self.lock = threading.Lock()
+
+        for part in parts:
+            self.part(part)
+
+    def part(self, part) -> PartResult:
+        with self.lock:
+            result = self.parts.get(part)
+
+            if result is None:
+                result = PartResult(part)
+                self.parts[part] = result
+
+            return result
+
+    def setDevice(self, part, dev_uuid):
+        result = self.part(part)
+        result.device_uuid = dev_uuid
+
+        with self.lock:
+            self.byDevice[dev_uuid] = result
+
+    def device(self, dev_uuid) -> PartResult:
+        """Returns the result for a device UUID. Devices requested by UUID are their own parts."""
+        with self.lock:
+            result = self.byDevice.get(dev_uuid)
+
+        if result is None:
+            self.setDevice(dev_uuid, dev_uuid)
+            result = self.part(dev_uuid)
+
+        return result
+
+    def component(self, uuid) -> PartResult:
+        with self.lock:
+            result = self.components.get(uuid)
+
+            if result is None:
+                result = PartResult(uuid)
+                self.components[uuid] = result
+
+            return result
+
+    def abort(self, err):
+        """Marks the run as failed, along with all parts that didn't finish"""
+        self.error = str(err)
+
+        for result in self.parts.values():
+            if result.status == STATUS_PENDING:
+                result.fail("aborted", err)
+
+    def finish(self):
+        """Marks parts that didn't fail as succeeded"""
+        for result in self.parts.values():
+            if result.status == STATUS_PENDING:
+                result.status = STATUS_OK
+
+    def failed(self):
+        return [result for result in self.parts.values() if result.status == STATUS_FAILED]
+
+    def succeeded(self):
+        return [result for result in self.parts.values() if result.status == STATUS_OK]
+
+    def skipped(self):
+        return [result for result in self.parts.values() if result.status == STATUS_SKIPPED]
+
+    def logSummary(self):
+        failed = self.failed()
+
+        info( "Parts downloaded: %d" % len(self.succeeded()) )
+        if self.skipped():
+            info( "Parts skipped: %d" % len(self.skipped()) )
+        info( "Failed parts: %d" % len(failed) )
+
+        for result in failed:
+            warning( "  %s: %s failed: %s" % (result.part, result.failed_stage, result.error) )
+
+        if failed:
+            info( "Parts to retry:\n" + "\n".join(result.part for result in failed) )
@@ -0,0 +1,728 @@
+#!/usr/bin/env python
+"""Library loader window. Imported on the first Run() of the action plugin, so
+requests, wx.html2 and the download code don't slow down KiCad startup."""
+from __future__ import annotations
+from typing import Optional
+
+import os
+import math
+import traceback
+import logging
+
+if "darwin" in os.sys.platform:
+    # SSL fix for macOS KiCad Python ---
+    try:
+        import certifi
+        os.environ.setdefault("SSL_CERT_FILE", certifi.where())
+    except Exception:
+        pass
+
+import requests
+import wx
+
+from .version import __version__, DEFAULT_USER_AGENT
+
+session = requests.Session()
+session.headers.update({"User-Agent": DEFAULT_USER_AGENT})
+
+wx_html2_available = True
+try: 
+    import wx.html2
+except ImportError as e:
+    wx_html2_available = False
+
+from threading import Lock, Thread
+from logging import info, warning, debug, error, critical
+from collections import deque
+
+import logging.handlers
+
+import wx.dataview
+
+from .component_loader import *
+from .easyeda_lib_loader_dialog import EasyEdaLibLoaderDialog
+from .config_manager import ConfigManager, LibraryTableManager
+from .http_cache import ResponseCache, MemoryLRU, getUserCacheDir
+from .library_storage import ShardedLibrary
+from .model_store import ModelStore
+from .datastr_cache import DataStrCache
+from .debug_log import LazyJson
+
+import ctypes
+import concurrent.futures
+
+LOG_FLUSH_INTERVAL_MS = 200
+LOG_MAX_LINES = 5000
+LOG_FORMAT = "%(levelname)s: %(message)s"
+
+# Delay before looking up the preview of a selected search result
+PREVIEW_DEBOUNCE_MS = 150
+
+# Device info of previewed parts, reused when they are downloaded
+DEVICE_CACHE_SIZE = 512
+device_cache = MemoryLRU(DEVICE_CACHE_SIZE)
+
+# Search result pages by (facet, words, page, page size)
+SEARCH_PAGE_SIZE = 50
+SEARCH_CACHE_SIZE = 64
+SEARCH_CACHE_TTL = 600
+search_cache = MemoryLRU(SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL)
+search_requests = {} # Pages being fetched, by key, so a prefetched page is not requested twice
+search_requests_lock = Lock()
+
+# Returns a page of search results, from the search cache if possible
+def fetchSearchPage(facet, words, page, pageSize):
+    key = (facet, words, page, pageSize)
+    found = search_cache.get(key)
+
+    if found is not None:
+        debug(f"Search page {page} from the cache")
+        return found
+
+    with search_requests_lock:
+        future = search_requests.get(key)
+        owner = future is None
+
+        if owner:
+            future = concurrent.futures.Future()
+            search_requests[key] = future
+
+    if not owner:
+        return future.result()
+
+    try:
+        reqData={
+            "page": page,
+            "pageSize": pageSize,
+            "wd": words,
+            "returnListStyle": "classifyarr"
+        }
+
+        if facet:
+            reqData |= {
+                "uid": facet,
+                "path": facet,
+            }
+
+        resp = session.post( "https://pro.easyeda.com/api/v2/devices/search", data=reqData )
+        resp.raise_for_status()
+        found = resp.json()
+
+        debug("search: %s", LazyJson(found))
+
+        if not found.get("success") or not found.get("result"):
+            raise Exception(f"Unable to search: {found}")
+
+        search_cache.put(key, found)
+        future.set_result(found)
+        return found
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with search_requests_lock:
+            search_requests.pop(key, None)
+
+def interrupt_thread(thread):
+    print("interrupt_thread")
+    if not thread.is_alive():
+        return
+
+    exc = ctypes.py_object(KeyboardInterrupt)
+    res = ctypes.pythonapi.PyThreadState_SetAsyncExc(
+        ctypes.c_long(thread.ident), exc)
+
+    if res == 0:
+        print("nonexistent thread id")
+        return False
+    elif res > 1:
+        # """if it returns a number greater than one, you're in trouble,
+        # and you should call it again with exc=NULL to revert the effect"""
+        ctypes.pythonapi.PyThreadState_SetAsyncExc(thread.ident, None)
+        print("PyThreadState_SetAsyncExc failed")
+
+        return False
+    
+    print("interrupt_thread success")
+    return True
+
+
+class WxTextCtrlHandler(logging.Handler):
+    """Buffers log records and appends them to a wx.TextCtrl in batches, on a timer.
+
+    At most max_lines are kept in the control, older lines are removed. If records
+    arrive faster than the control is updated, the oldest pending ones are dropped.
+    """
+
+    def __init__(self, ctrl: wx.TextCtrl, max_lines=LOG_MAX_LINES, flush_interval_ms=LOG_FLUSH_INTERVAL_MS):
+        logging.Handler.__init__(self)
+        self.ctrl = ctrl
+        self.max_lines = max_lines
+        self.pending = deque(maxlen=max_lines)
+        self.dropped = 0
+        self.visibleLines = 0
+
+        # Must be created on the UI thread
+        self.timer = wx.Timer(ctrl)
+        ctrl.Bind(wx.EVT_TIMER, lambda event: self.flush(), self.timer)
+        self.timer.Start(flush_interval_ms)
+
+    def emit(self, record):
+        try:
+            s = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+
+        with self.lock:
+            if len(self.pending) == self.pending.maxlen:
+                self.dropped += 1
+
+            self.pending.append(s)
+
+    def flush(self):
+        with self.lock:
+            if not self.pending:
+                return
+
+            lines = list(self.pending)
+            dropped = self.dropped
+            self.pending.clear()
+            self.dropped = 0
+
+        if dropped:
+            lines.insert(0, f"... {dropped} log messages skipped ...")
+
+        text = "\n".join(lines) + "\n"
+
+        self.ctrl.Freeze()
+        try:
+            self.ctrl.AppendText(text)
+            self.visibleLines += text.count("\n")
+
+            excess = self.visibleLines - self.max_lines
+            if excess > 0:
+                pos = self.ctrl.XYToPosition(0, excess)
+
+                if pos > 0:
+                    self.ctrl.Remove(0, pos)
+                    self.visibleLines -= excess
+        finally:
+            self.ctrl.Thaw()
+
+    def setMaxLines(self, max_lines):
+        with self.lock:
+            self.max_lines = max_lines
+            self.pending = deque(self.pending, maxlen=max_lines)
+
+    def clear(self):
+        with self.lock:
+            self.pending.clear()
+            self.dropped = 0
+
+        self.ctrl.Clear()
+        self.visibleLines = 0
+
+    def close(self):
+        self.timer.Stop()
+        logging.Handler.close(self)
+
+
+# Keep the full log in a rotating file, as the log control only shows the last lines
+def createLogFileHandler(max_size_mb, backup_count):
+    path = getUserCacheDir("jlc-kicad-lib-loader.log")
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_size_mb * 1024 * 1024,
+                                                       backupCount=backup_count, encoding="utf-8")
+    except OSError as e:
+        warning(f"Cannot write log file {path}: {e}")
+        return None
+
+    handler.setFormatter(logging.Formatter("%(asctime)s " + LOG_FORMAT))
+    return handler
+
+class LibLoaderWindow:
+    dialog: Optional[EasyEdaLibLoaderDialog] = None
+    downloadThread: Optional[Thread] = None
+    searchThread: Optional[Thread] = None
+    searchPage = 1
+    components = []
+    previewGeneration = 0
+    previewExecutor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+    prefetchExecutor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+    searchPageSize = SEARCH_PAGE_SIZE
+
+    def show(self):
+        if(self.dialog is None):
+            self.dialog = self.createDialog()
+
+        self.dialog.Show()
+        self.dialog.Raise()
+
+    def createDialog(self):
+        frame = wx.FindWindowByName("PcbFrame")
+    
+        dlg = EasyEdaLibLoaderDialog(frame)
+        dlg.SetTitle(dlg.GetTitle() + f" Version {__version__}")
+
+        handler = WxTextCtrlHandler(dlg.m_log)
+        logging.getLogger().handlers.clear();
+        logging.getLogger().addHandler(handler)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        logging.getLogger().setLevel(level=logging.INFO)
+        
+        # Get KIPRJMOD early to initialize config
+        kiprjmod = os.getenv("KIPRJMOD") or ""
+        config_manager = None
+        library_manager = None
+        
+        if kiprjmod:
+            config_manager = ConfigManager(kiprjmod)
+            library_manager = LibraryTableManager(kiprjmod)
+
+        configureSession(session, config_manager.get_host_limits() if config_manager else None)
+
+        # Created once, so its in-memory entries are reused by later downloads
+        datastr_cache = DataStrCache()
+
+        if config_manager:
+            datastr_cache = None
+            if config_manager.get_datastr_cache_enabled():
+                datastr_cache = DataStrCache(max_size=config_manager.get_datastr_cache_max_size_mb() * 1024 * 1024,
+                                             memory_entries=config_manager.get_datastr_cache_memory_entries())
+
+        # Device info lookups for the search preview, and search page prefetches, one at a time
+        self.previewExecutor = concurrent.futures.ThreadPoolExecutor(1)
+        self.prefetchExecutor = concurrent.futures.ThreadPoolExecutor(1)
+
+        if config_manager:
+            self.searchPageSize = max(1, config_manager.get_search_page_size(SEARCH_PAGE_SIZE))
+
+        if config_manager:
+            handler.setMaxLines(config_manager.get_log_max_lines(LOG_MAX_LINES))
+
+            if config_manager.get_log_file_enabled():
+                fileHandler = createLogFileHandler(config_manager.get_log_file_max_size_mb(), config_manager.get_log_file_backup_count())
+
+                if fileHandler:
+                    logging.getLogger().addHandler(fileHandler)
+                    info(f"Writing log to {fileHandler.baseFilename}")
+
+        def setProgress( current, total ):
+            dlg.m_progress.SetRange(total)
+            dlg.m_progress.SetValue(current)
+
+        # Called from download threads, which coalesce model progress updates
+        def progressHandler( current, total ):
+            wx.CallAfter(setProgress, current, total)
+
+        def onDebugCheckbox( event: wx.CommandEvent ):
+            logging.getLogger().setLevel( logging.DEBUG if event.IsChecked() else logging.INFO )
+
+        def onDownload( event ):
+            handler.clear()
+
+            if not dlg.m_textCtrlParts.GetValue().strip():
+                for sel in dlg.m_searchResultsTree.GetSelections():
+                    dlg.m_textCtrlParts.AppendText(dlg.m_searchResultsTree.GetItemText(sel) + "\n")
+
+            components = dlg.m_textCtrlParts.GetValue().splitlines()
+
+            if not components:
+                error( "No parts to download." )
+                return
+
+            kiprjmod = os.getenv("KIPRJMOD") or ""
+
+            if not kiprjmod:
+                error( "KIPRJMOD is not set properly." )
+                return
+            
+            lib_field = dlg.m_textCtrlOutLibName.GetValue()
+            
+            if os.path.isabs(lib_field):
+                target_path = lib_field
+            else:
+                target_path = os.path.join(kiprjmod, lib_field)
+
+            target_name = os.path.basename(target_path);
+            
+            # Save library name to config
+            if config_manager:
+                config_manager.set_library_name(lib_field)
+            
+            shard_count = config_manager.get_shard_count() if config_manager else 0
+            fixup_processes = (os.cpu_count() or 1) if config_manager and config_manager.get_parallel_fixup() else 0
+            engine = config_manager.get_download_engine() if config_manager else "threads"
+            force_refresh = config_manager.get_force_refresh() if config_manager else False
+            dump_dir = config_manager.get_dump_dir() if config_manager else None
+            profile = dlg.m_debug.IsChecked() # Debug runs also log stage timings and a profile
+
+            # Check if library exists in tables and prompt to add if not.
+            # Shards of a sharded library are registered after download.
+            if library_manager and not shard_count:
+                library_manager.prompt_add_library(dlg, target_name, target_path)
+
+            cache = ResponseCache()
+            model_store = ModelStore()
+            search_batch_size = SEARCH_BATCH_SIZE
+
+            if config_manager:
+                search_batch_size = config_manager.get_search_batch_size(SEARCH_BATCH_SIZE)
+                cache = ResponseCache(max_size=config_manager.get_cache_max_size_mb() * 1024 * 1024,
+                                      ttl=config_manager.get_cache_ttl_hours() * 3600,
+                                      offline=config_manager.get_cache_offline())
+                model_store = None
+                if config_manager.get_model_store_enabled():
+                    model_store = ModelStore(max_size=config_manager.get_model_store_max_size_mb() * 1024 * 1024)
+
+            def threadedFn():
+                loader = ComponentLoader(kiprjmod=kiprjmod, target_path=target_path, target_name=target_name, progress=progressHandler, session=session,
+                                         cache=cache, search_batch_size=search_batch_size, shard_count=shard_count,
+                                         fixup_processes=fixup_processes, model_store=model_store, engine=engine,
+                                         force_refresh=force_refresh, dump_dir=dump_dir, device_cache=device_cache,
+                                         profile=profile, datastr_cache=datastr_cache)
+                result = loader.downloadAll(components)
+                failed = result.failed()
+
+                # Leave only the failed parts in the list, so the next download retries them
+                if failed and not result.error:
+                    wx.CallAfter(dlg.m_textCtrlParts.SetValue, "".join(part.part + "\n" for part in failed))
+                    info("Failed parts were left in the parts list. Press Download to retry them.")
+
+                if library_manager and shard_count:
+                    shards = ShardedLibrary(target_path, target_name, shard_count).shardNames()
+
+                    if library_manager.register_shards(target_name, shards):
+                        info("Library shards were added to the project library tables. You may need to restart KiCad for the changes to take effect.")
+
+                wx.CallAfter(dlg.m_actionBtn.Enable)
+
+            dlg.m_actionBtn.Disable()
+            self.downloadThread = Thread(target = threadedFn, daemon=True)
+            self.downloadThread.start()
+
+        def searchFn(facet, words, page):
+            def setStatus( status ):
+                wx.CallAfter(dlg.m_searchStatus.SetLabel, status)
+                wx.CallAfter(dlg.m_statusPanel.Layout)
+
+            def setPageText( pageText ):
+                wx.CallAfter(dlg.m_searchPage.SetLabel, pageText)
+                wx.CallAfter(dlg.m_statusPanel.Layout)
+
+            def clearItems():
+                wx.CallAfter(dlg.m_searchResultsTree.DeleteAllItems)
+
+            def appendItem( data ):
+                treeItem = dlg.m_searchResultsTree.AppendItem( dlg.m_searchResultsTree.GetRootItem(), data[0] )
+
+                for i in range(1, len(data)):
+                    dlg.m_searchResultsTree.SetItemText(treeItem, i, data[i]);
+
+            def addItem( item ):
+                wx.CallAfter(appendItem, item)
+
+
+            setStatus("Searching...")
+            clearItems()
+
+            wx.CallAfter(dlg.m_prevPageBtn.Disable)
+            wx.CallAfter(dlg.m_nextPageBtn.Disable)
+
+            try:
+                pageSize = self.searchPageSize
+                found = fetchSearchPage(facet, words, page, pageSize)
+
+                totalDevices = sum(found["result"]["facets"].values())
+
+                for facetList in found["result"]["lists"].values():
+                    for entry in facetList:
+                        addItem([
+                            entry.get("product_code", entry["uuid"]),
+                            entry["display_title"],
+                            entry["attributes"].get("Manufacturer", ""),
+                            entry["symbol"]["display_title"] if entry.get("symbol") else "",
+                            entry["footprint"]["display_title"] if entry.get("footprint") else ""
+                        ])
+
+                curPage = int(found['result']['page'])
+                totalPages = math.ceil(totalDevices / pageSize)
+
+                if(curPage > 1):
+                    wx.CallAfter(dlg.m_prevPageBtn.Enable)
+
+                if(curPage < totalPages):
+                    wx.CallAfter(dlg.m_nextPageBtn.Enable)
+
+                    # Load the next page while the user looks at this one
+                    if (facet, words, curPage + 1, pageSize) not in search_cache:
+                        self.prefetchExecutor.submit(prefetchSearchPage, facet, words, curPage + 1, pageSize)
+
+                setStatus(f"{totalDevices} parts.")
+                setPageText(f"Page {curPage}/{totalPages}")
+
+            except KeyboardInterrupt:
+                print("KeyboardInterrupt.")
+            except Exception as e:
+                traceback.print_exc()
+                setStatus(f"Failed to search parts: {e}")
+
+            finally:
+                self.searchThread = None
+
+        def prefetchSearchPage(facet, words, page, pageSize):
+            try:
+                fetchSearchPage(facet, words, page, pageSize)
+            except Exception as e:
+                debug(f"Failed to prefetch search page {page}: {e}")
+
+        def loadSearchPage( facetId, words, page ):
+            if self.searchThread:
+                interrupt_thread(self.searchThread)
+                self.searchThread.join()
+
+            facet = [None, "lcsc", "user"][facetId]
+
+            self.searchThread = Thread(target = searchFn, 
+                                 daemon=True, 
+                                 args=(facet, words, page))
+            self.searchThread.start()
+
+        def onSearch( event ):
+            self.searchPage = 1
+            loadSearchPage(dlg.m_libSourceChoice.GetSelection(), dlg.m_textCtrlSearch.GetValue(), self.searchPage)
+
+        def onNextPage( event ):
+            self.searchPage += 1
+            loadSearchPage(dlg.m_libSourceChoice.GetSelection(), dlg.m_textCtrlSearch.GetValue(), self.searchPage)
+        
+        def onPrevPage( event ):
+            self.searchPage -= 1
+            loadSearchPage(dlg.m_libSourceChoice.GetSelection(), dlg.m_textCtrlSearch.GetValue(), self.searchPage)
+
+        def lookupDevice( itemCode ):
+            device = device_cache.get(itemCode)
+
+            if device is None:
+                dev_info = session.get(f"https://pro.easyeda.com/api/devices/{itemCode}")
+                dev_info.raise_for_status()
+                device = dev_info.json()["result"]
+                debug("device info: %s", LazyJson(device))
+
+                device_cache.put(itemCode, device)
+
+            return device
+
+        def onSearchItemActivated( event ):
+            if dlg.m_textCtrlParts.GetValue() and not dlg.m_textCtrlParts.GetValue().endswith("\n"):
+                dlg.m_textCtrlParts.AppendText("\n")
+
+            dlg.m_textCtrlParts.AppendText(dlg.m_searchResultsTree.GetItemText(event.GetItem()) + "\n")
+
+        def showCodePreview( itemCode ):
+            dlg.m_searchHyperlink1.SetLabelText( f"{itemCode} Preview" )
+            dlg.m_searchHyperlink1.SetURL( f"https://jlcpcb.com/user-center/lcsvg/svg.html?code={itemCode}" )
+            dlg.m_searchHyperlink1.Show()
+
+            dlg.m_searchHyperlink2.SetLabelText( f"JLCPCB" )
+            dlg.m_searchHyperlink2.SetURL( f"https://jlcpcb.com/partdetail/{itemCode}" )
+            dlg.m_searchHyperlink2.Show()
+
+            dlg.m_searchHyperlink3.SetLabelText( f"LCSC" )
+            dlg.m_searchHyperlink3.SetURL( f"https://www.lcsc.com/product-detail/{itemCode}.html" )
+            dlg.m_searchHyperlink3.Show()
+
+            dlg.m_statusPanel.Layout()
+
+            global wx_html2_available
+            if wx_html2_available:
+                self.webView.Hide()
+                self.webView.LoadURL( f"https://jlcpcb.com/user-center/lcsvg/svg.html?code={itemCode}" )
+                self.webView.SetZoomFactor(0.8)
+
+        # Show the preview of a device UUID, with device info from lookupDevice, or None if the lookup failed
+        def showDevicePreview( itemCode, device, generation ):
+            if generation != self.previewGeneration:
+                return # The selection has changed since the lookup started
+
+            easyedaLink = None
+            attributes = device['attributes'] if device else {}
+
+            if attributes.get('Symbol') or attributes.get('Footprint'):
+                # https://pro.easyeda.com/editor#tab=*!{sym_uuid}(device){dev_uuid}|!{fp_uuid}(device){dev_uuid}
+                tabList = []
+
+                if attributes.get('Symbol'):
+                    tabList.append(f"!{attributes['Symbol']}(device){itemCode}")
+
+                if attributes.get('Footprint'):
+                    tabList.append(f"!{attributes['Footprint']}(device){itemCode}")
+
+                easyedaLink = f"https://pro.easyeda.com/editor#tab=*{'|'.join(tabList)}"
+
+            if easyedaLink:
+                dlg.m_searchHyperlink1.SetLabelText( f"Open in EasyEDA Pro" )
+                dlg.m_searchHyperlink1.SetURL( easyedaLink )
+                dlg.m_searchHyperlink1.Show()
+            else:
+                dlg.m_searchHyperlink1.Hide()
+
+            dlg.m_searchHyperlink2.Hide()
+            dlg.m_searchHyperlink3.Hide()
+
+            dlg.m_statusPanel.Layout()
+
+            global wx_html2_available
+            if wx_html2_available:
+                self.webView.Hide()
+
+                table_rows = ''.join(
+                    f"""<tr>
+                        <td><b>{key}</b></td>
+                        <td>
+                        {value if not (isinstance(value, str) and value.startswith(('http://', 'https://'))) else f'<a href="{value}" target="_blank">{value}</a>'}
+                        </td>
+                    </tr>"""
+                    for key, value in attributes.items()
+                )
+                
+                style = """
+                    body {
+                        font-family: sans-serif;
+                    }
+                    table {
+                        border:1px solid #CCC;
+                        border-collapse:collapse;
+                    }
+                    td {
+                        border:1px solid #CCC;
+                        padding: 2px;
+                    }
+                """
+
+                html_content = f"""
+                <html>
+                <head>
+                    <style>
+                    {style}
+                    </style>
+                </head>
+                <body>
+                    <p><b>Device UUID: {itemCode}</b></p>
+                    <table>
+                        {table_rows}
+                    </table>
+                </body>
+                </html>
+                """
+                self.webView.SetPage(html_content, "")
+                self.webView.SetZoomFactor(1.0)
+
+        # Look up device info in a worker thread. Lookups for rows that are no longer selected are skipped.
+        def lookupPreview( itemCode, generation ):
+            if generation != self.previewGeneration:
+                return
+
+            try:
+                device = lookupDevice(itemCode)
+            except Exception as e:
+                debug(f"Failed to get device info for {itemCode}: {e}")
+                device = None
+
+            wx.CallAfter(showDevicePreview, itemCode, device, generation)
+
+        def startPreviewLookup( itemCode, generation ):
+            if generation == self.previewGeneration:
+                self.previewExecutor.submit(lookupPreview, itemCode, generation)
+
+        def onSearchItemSelected( event ):
+            itemCode = dlg.m_searchResultsTree.GetItemText(event.GetItem())
+
+            # Invalidates pending lookups of previously selected rows
+            self.previewGeneration += 1
+
+            if itemCode.startswith("C"):
+                showCodePreview(itemCode)
+                return
+
+            device = device_cache.get(itemCode)
+
+            if device is not None:
+                showDevicePreview(itemCode, device, self.previewGeneration)
+            else:
+                # Wait until the selection settles, so scrolling through rows doesn't send a request for each
+                wx.CallLater(PREVIEW_DEBOUNCE_MS, startPreviewLookup, itemCode, self.previewGeneration)
+
+        def onWebviewLoaded( event ):
+            self.webView.Show()
+
+        def onWebviewNewWindow( event ):
+            wx.LaunchDefaultBrowser( event.GetURL() )
+
+        def onDestroy( event ):
+            if self.searchThread:
+                interrupt_thread(self.searchThread)
+                self.searchThread.join( 5 )
+                
+            if self.downloadThread:
+                interrupt_thread(self.downloadThread)
+                self.downloadThread.join( 5 )
+
+            self.previewExecutor.shutdown(wait=False, cancel_futures=True)
+            self.prefetchExecutor.shutdown(wait=False, cancel_futures=True)
+
+            for h in list(logging.getLogger().handlers):
+                logging.getLogger().removeHandler(h)
+                h.close()
+
+            event.Skip()
+
+        dlg.m_searchResultsTree.AppendColumn("Code/UUID", width=wx.COL_WIDTH_AUTOSIZE, flags=wx.COL_RESIZABLE | wx.COL_SORTABLE )
+        dlg.m_searchResultsTree.AppendColumn("Name", width=wx.COL_WIDTH_AUTOSIZE, flags=wx.COL_RESIZABLE | wx.COL_SORTABLE)
+        dlg.m_searchResultsTree.AppendColumn("Manufacturer", width=wx.COL_WIDTH_AUTOSIZE, flags=wx.COL_RESIZABLE | wx.COL_SORTABLE)
+        dlg.m_searchResultsTree.AppendColumn("Symbol", width=wx.COL_WIDTH_AUTOSIZE, flags=wx.COL_RESIZABLE | wx.COL_SORTABLE)
+        dlg.m_searchResultsTree.AppendColumn("Footprint", width=wx.COL_WIDTH_AUTOSIZE, flags=wx.COL_RESIZABLE | wx.COL_SORTABLE)
+
+        # Load library name from config or use default
+        default_lib_name = "EasyEDA_Lib"
+        if config_manager:
+            default_lib_name = config_manager.get_library_name(default_lib_name)
+        dlg.m_textCtrlOutLibName.SetValue(default_lib_name);
+
+        global wx_html2_available
+        if wx_html2_available:
+            try:
+                self.webView = wx.html2.WebView.New(dlg.m_webViewPanel)
+                self.webView.Bind(wx.html2.EVT_WEBVIEW_LOADED, onWebviewLoaded)
+                self.webView.Bind(wx.html2.EVT_WEBVIEW_NEWWINDOW, onWebviewNewWindow)
+            except NotImplementedError as err:
+                self.webView = wx.StaticText(dlg.m_webViewPanel, style=wx.ALIGN_CENTER_VERTICAL|wx.ALIGN_CENTRE_HORIZONTAL)
+                self.webView.SetLabel("Preview is not supported in this wxPython environment.")
+                dlg.m_webViewPanel.SetMinSize( wx.Size(20, 20) )
+                wx_html2_available = False
+        else:
+            self.webView = wx.StaticText(dlg.m_webViewPanel, style=wx.ALIGN_CENTER_VERTICAL|wx.ALIGN_CENTRE_HORIZONTAL)
+            self.webView.SetLabel("wx.html2 is not available. Install python3-wxgtk-webview4.0 (Debian/Ubuntu)")
+            dlg.m_webViewPanel.SetMinSize( wx.Size(20, 20) )
+
+        dlg.m_webViewPanel.GetSizer().Add(self.webView, 1, wx.EXPAND)
+        dlg.m_webViewPanel.Layout()
+
+        dlg.SetEscapeId(wx.ID_CANCEL)
+        dlg.Bind(wx.EVT_WINDOW_DESTROY, onDestroy)
+        
+        dlg.m_searchResultsTree.Bind(wx.dataview.EVT_TREELIST_ITEM_ACTIVATED, onSearchItemActivated)
+        dlg.m_searchResultsTree.Bind(wx.dataview.EVT_TREELIST_SELECTION_CHANGED, onSearchItemSelected)
+        dlg.m_actionBtn.Bind(wx.EVT_BUTTON, onDownload)
+        dlg.m_searchBtn.Bind(wx.EVT_BUTTON, onSearch)
+        dlg.m_prevPageBtn.Bind(wx.EVT_BUTTON, onPrevPage)
+        dlg.m_nextPageBtn.Bind(wx.EVT_BUTTON, onNextPage)
+        dlg.m_textCtrlSearch.Bind(wx.EVT_TEXT_ENTER, onSearch)
+        dlg.m_libSourceChoice.Bind(wx.EVT_CHOICE, onSearch)
+        dlg.m_debug.Bind(wx.EVT_CHECKBOX, onDebugCheckbox)
+
+        dlg.m_textCtrlSearch.SetFocus()
+        return dlg
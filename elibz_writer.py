@@ -0,0 +1,184 @@
+import os
+import sys
+import json
+import zlib
+import zipfile
+
+from logging import info, warning, debug, error
+
+DEVICE_FILE = "device.json"
+ENTRY_TYPES = ["devices", "symbols", "footprints"]
+
+# append() relies on ZipFile internals (start_dir, filelist, NameToInfo, and new members being
+# written at start_dir). Append, append and compact sequences were checked with testzip(),
+# namelist() and unzip -t on CPython 3.7 to 3.13. Other versions compact instead of appending.
+APPEND_VERIFIED_VERSIONS = ((3, 7), (3, 13))
+
+
+def appendSupported():
+    oldest, newest = APPEND_VERIFIED_VERSIONS
+    return oldest <= sys.version_info[:2] <= newest and hasattr(zipfile.ZipFile, "_open_to_write")
+
+
+def emptyDeviceFile():
+    return {entry_type: {} for entry_type in ENTRY_TYPES}
+
+
+# Merge device.json contents. Entries from newData replace the ones in oldData.
+def mergeDeviceFiles(oldData, newData):
+    merged = emptyDeviceFile()
+
+    for entry_type in ENTRY_TYPES:
+        merged[entry_type].update(oldData.get(entry_type, {}))
+        merged[entry_type].update(newData.get(entry_type, {}))
+
+    return merged
+
+
+def symbolMemberName(uuid):
+    return f"SYMBOL/{uuid}.esym"
+
+
+def footprintMemberName(uuid):
+    return f"FOOTPRINT/{uuid}.efoo"
+
+
+class ElibzWriter:
+    """Adds parts to an .elibz archive without rewriting the whole archive.
+
+    device.json is always kept as the last member. New .esym/.efoo members are
+    appended in place of the old device.json, followed by the merged device.json
+    and a new central directory. The archive is rewritten from scratch (compacted)
+    only when an existing member gets different content, or when the archive
+    does not have this layout yet, or on Python versions where appending has
+    not been verified (see APPEND_VERIFIED_VERSIONS).
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def readDeviceFile(self):
+        """Returns the contents of device.json, or an empty device file"""
+        if not os.path.exists(self.path):
+            return emptyDeviceFile()
+
+        with zipfile.ZipFile(self.path, "r") as zf:
+            if DEVICE_FILE not in zf.NameToInfo:
+                return emptyDeviceFile()
+
+            return json.loads(zf.read(DEVICE_FILE).decode("utf-8"))
+
+    def write(self, libDeviceFile, symbolDataStr, footprintDataStr):
+        """Merges libDeviceFile into device.json and adds symbol/footprint data.
+
+        Returns True if the archive was compacted.
+        """
+        members = {}
+        for uuid, ds in footprintDataStr.items():
+            members[footprintMemberName(uuid)] = ds.encode("utf-8") if isinstance(ds, str) else ds
+        for uuid, ds in symbolDataStr.items():
+            members[symbolMemberName(uuid)] = ds.encode("utf-8") if isinstance(ds, str) else ds
+
+        if not os.path.exists(self.path):
+            self.rewrite(libDeviceFile, members)
+            return True
+
+        try:
+            with zipfile.ZipFile(self.path, "r") as zf:
+                infos = zf.infolist()
+                oldData = emptyDeviceFile()
+
+                if DEVICE_FILE in zf.NameToInfo:
+                    oldData = json.loads(zf.read(DEVICE_FILE).decode("utf-8"))
+        except Exception as e:
+            warning(f"Failed to merge device.json data, overwriting: {e}")
+            self.rewrite(libDeviceFile, members)
+            return True
+
+        merged = mergeDeviceFiles(oldData, libDeviceFile)
+        existing = {zinfo.filename: zinfo for zinfo in infos}
+
+        newMembers = {}
+        needsCompaction = len(existing) != len(infos) # Duplicate member names
+
+        for name, data in members.items():
+            zinfo = existing.get(name)
+
+            if zinfo is None:
+                newMembers[name] = data
+            elif zinfo.file_size != len(data) or zinfo.CRC != zlib.crc32(data):
+                debug(f"Member {name} changed, compacting library")
+                needsCompaction = True
+
+        lastMember = max(infos, key=lambda zinfo: zinfo.header_offset) if infos else None
+
+        if not lastMember or lastMember.filename != DEVICE_FILE:
+            needsCompaction = True
+
+        if needsCompaction:
+            self.compact(merged, members)
+            return True
+
+        if not newMembers and merged == oldData:
+            debug(f"Library {self.path} is up to date")
+            return False
+
+        if not appendSupported():
+            self.compact(merged, members)
+            return True
+
+        self.append(merged, newMembers)
+        return False
+
+    def append(self, deviceData, newMembers):
+        with zipfile.ZipFile(self.path, "a", compression=zipfile.ZIP_DEFLATED) as zf:
+            # Drop the trailing device.json: new members are written over it,
+            # and the updated device.json is appended after them.
+            oldDeviceInfo = zf.getinfo(DEVICE_FILE)
+            zf.filelist.remove(oldDeviceInfo)
+            del zf.NameToInfo[DEVICE_FILE]
+            zf.start_dir = oldDeviceInfo.header_offset
+
+            for name, data in newMembers.items():
+                zf.writestr(name, data)
+
+            zf.writestr(DEVICE_FILE, json.dumps(deviceData, indent=4))
+
+        debug(f"Appended {len(newMembers)} members to {self.path}")
+
+    def compact(self, deviceData, members):
+        """Rewrites the archive, keeping old members that are not replaced"""
+        tmpPath = self.path + ".tmp"
+
+        with zipfile.ZipFile(self.path, "r") as old_zip:
+            with zipfile.ZipFile(tmpPath, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+                written = set()
+
+                for name, data in members.items():
+                    zf.writestr(name, data)
+                    written.add(name)
+
+                # With duplicate names, the last member wins
+                latest = {zinfo.filename: zinfo for zinfo in old_zip.infolist()}
+
+                for name, zinfo in latest.items():
+                    if name == DEVICE_FILE or name in written:
+                        continue
+
+                    zf.writestr(name, old_zip.read(zinfo))
+
+                zf.writestr(DEVICE_FILE, json.dumps(deviceData, indent=4))
+
+        os.replace(tmpPath, self.path)
+        info(f"Compacted library {self.path}")
+
+    def rewrite(self, deviceData, members):
+        tmpPath = self.path + ".tmp"
+
+        with zipfile.ZipFile(tmpPath, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for name, data in members.items():
+                zf.writestr(name, data)
+
+            zf.writestr(DEVICE_FILE, json.dumps(deviceData, indent=4))
+
+        os.replace(tmpPath, self.path)
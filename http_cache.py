@@ -0,0 +1,236 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import threading
+
+from collections import OrderedDict
+
+from logging import info, warning, debug, error
+
+APP_NAME = "jlc-kicad-lib-loader"
+
+DEFAULT_CACHE_MAX_SIZE = 256 * 1024 * 1024
+DEFAULT_CACHE_TTL = 7 * 24 * 3600
+
+
+def getUserCacheDir(*subdirs):
+    """Returns the per-user cache directory of the plugin, joined with subdirs"""
+    if sys.platform == "win32":
+        base = os.getenv("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+
+    return os.path.join(base, APP_NAME, *subdirs)
+
+
+class CacheMiss(Exception):
+    """Raised in offline mode when the requested entry is not cached"""
+
+
+class DiskLRU:
+    """Size-bounded directory of files with least-recently-used eviction.
+
+    File modification times serve as access times: every hit touches the file,
+    so the oldest files are the least recently used ones.
+    """
+
+    def __init__(self, root, max_size):
+        self.root = root
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.size = None
+
+    def entryPath(self, key, suffix=""):
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, digest[:2], digest + suffix)
+
+    def touch(self, path):
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def storeFile(self, path, data: bytes):
+        """Atomically writes data to path and evicts old entries if over the limit"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        tmpPath = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmpPath, "wb") as f:
+            f.write(data)
+        os.replace(tmpPath, path)
+        self.added(len(data))
+
+    def added(self, size):
+        """Accounts for a newly stored file and evicts old entries if over the limit"""
+        with self.lock:
+            if self.size is None:
+                self.size = self.scanSize()
+            else:
+                self.size += size
+
+            if self.size > self.max_size:
+                self.evict()
+
+    def scanSize(self):
+        return sum(size for _, _, size in self.listFiles())
+
+    def listFiles(self):
+        files = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith(".tmp"): # Being written
+                    continue
+
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files.append((st.st_mtime, path, st.st_size))
+        return files
+
+    def evict(self):
+        """Removes least recently used files until the cache is 10% below its limit"""
+        files = sorted(self.listFiles())
+        total = sum(size for _, _, size in files)
+        target = self.max_size * 0.9
+
+        for _, path, size in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError as e:
+                debug(f"Failed to evict cache file {path}: {e}")
+
+        debug(f"Cache {self.root} evicted down to {total} bytes")
+        self.size = total
+
+
+class MemoryLRU:
+    """Thread-safe in-memory mapping that keeps the max_entries most recently used entries.
+    With ttl, entries older than ttl seconds are treated as missing."""
+
+    def __init__(self, max_entries, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict() # Key to (time added, value)
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key not in self.entries:
+                return default
+
+            added, value = self.entries[key]
+
+            if self.ttl is not None and time.monotonic() - added > self.ttl:
+                del self.entries[key]
+                return default
+
+            self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic(), value)
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def __contains__(self, key):
+        return self.get(key, self) is not self
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class ResponseCache(DiskLRU):
+    """On-disk cache of EasyEDA API JSON responses keyed by kind and UUID.
+
+    Entries younger than ttl are returned without any network access, older
+    entries are revalidated with their ETag. In offline mode the network is
+    never used and missing entries raise CacheMiss.
+    """
+
+    def __init__(self, root=None, max_size=DEFAULT_CACHE_MAX_SIZE, ttl=DEFAULT_CACHE_TTL, offline=False):
+        super().__init__(root or getUserCacheDir("responses"), max_size)
+        self.ttl = ttl
+        self.offline = offline
+
+    def lookup(self, kind, key):
+        """Returns the cached entry dict, or None if not cached"""
+        path = self.entryPath(f"{kind}/{key}", ".json")
+
+        try:
+            with open(path, "rb") as f:
+                entry = json.loads(f.read().decode("utf-8"))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            warning(f"Ignoring corrupted cache entry {path}: {e}")
+            return None
+
+        self.touch(path)
+        return entry
+
+    def isFresh(self, entry):
+        return self.offline or time.time() - entry.get("time", 0) < self.ttl
+
+    def get(self, kind, key):
+        """Returns cached data if it can be used without revalidation, otherwise None"""
+        entry = self.lookup(kind, key)
+
+        if entry is not None and self.isFresh(entry):
+            return entry["data"]
+
+        return None
+
+    def put(self, kind, key, data, etag=None):
+        entry = {
+            "time": time.time(),
+            "etag": etag,
+            "data": data
+        }
+
+        try:
+            self.storeFile(self.entryPath(f"{kind}/{key}", ".json"), json.dumps(entry).encode("utf-8"))
+        except Exception as e:
+            warning(f"Failed to write cache entry {kind}/{key}: {e}")
+
+    def getJson(self, session, kind, key, url):
+        """GETs a JSON API response through the cache"""
+        entry = self.lookup(kind, key)
+
+        if entry is not None and self.isFresh(entry):
+            debug(f"Cache hit: {kind}/{key}")
+            return entry["data"]
+
+        if self.offline:
+            raise CacheMiss(f"{kind}/{key} is not in the cache (offline mode)")
+
+        headers = {}
+        if entry is not None and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+
+        resp = session.get(url, headers=headers)
+
+        if resp.status_code == 304 and entry is not None:
+            debug(f"Cache revalidated: {kind}/{key}")
+            self.put(kind, key, entry["data"], entry.get("etag"))
+            return entry["data"]
+
+        resp.raise_for_status()
+        data = resp.json()
+
+        # Don't cache error responses
+        if data.get("result"):
+            self.put(kind, key, data, resp.headers.get("ETag"))
+
+        return data
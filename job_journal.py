@@ -0,0 +1,113 @@
+import os
+import json
+import time
+import threading
+
+from logging import info, warning, debug, error
+
+JOURNAL_VERSION = 1
+
+# Minimum seconds between journal writes during a download
+JOURNAL_SAVE_INTERVAL = 1.0
+
+
+class JobJournal:
+    """Records the completed stages of each part of a download in <name>.journal.json,
+    next to the library, so an interrupted or partially failed download can be resumed.
+
+    Entries are keyed by the requested part (C-code or device UUID):
+
+        {"device": <uuid>, "stages": ["library", "model"], "model": {...}, "failed": {...}}
+
+    A part is done when both its library and model stages are complete. The journal
+    is removed once all of its parts are done.
+    """
+
+    def __init__(self, target_path, target_name):
+        self.path = os.path.join(target_path, f"{target_name}.journal.json")
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.lastSave = 0.0
+        self.parts = self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return {}
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                journal = json.load(f)
+
+            if journal.get("version") == JOURNAL_VERSION:
+                return journal["parts"]
+
+            warning(f"Unsupported job journal version in {self.path}, ignoring it")
+        except Exception as e:
+            warning(f"Failed to read job journal {self.path}, ignoring it: {e}")
+
+        return {}
+
+    def entry(self, part):
+        with self.lock:
+            return dict(self.parts.get(part, {}))
+
+    def update(self, part, *stages, **data):
+        with self.lock:
+            entry = self.parts.setdefault(part, {})
+
+            for stage in stages:
+                if stage not in entry.setdefault("stages", []):
+                    entry["stages"].append(stage)
+
+            entry.update(data)
+            self.dirty = True
+
+    # Forget the recorded stages of a part, so it is downloaded again
+    def reset(self, part):
+        with self.lock:
+            if self.parts.pop(part, None) is not None:
+                self.dirty = True
+
+    def clearFailure(self, part):
+        with self.lock:
+            if self.parts.get(part, {}).pop("failed", None):
+                self.dirty = True
+
+    @staticmethod
+    def isDone(entry):
+        stages = entry.get("stages", [])
+        return "library" in stages and "model" in stages
+
+    def allDone(self):
+        with self.lock:
+            return all(self.isDone(entry) for entry in self.parts.values())
+
+    # Write the journal if it changed. Unless forced, writes are limited to one per JOURNAL_SAVE_INTERVAL.
+    def save(self, force=True):
+        with self.lock:
+            if not self.dirty or (not force and time.monotonic() - self.lastSave < JOURNAL_SAVE_INTERVAL):
+                return
+
+            tmpPath = self.path + ".tmp"
+
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+                with open(tmpPath, "w", encoding="utf-8") as f:
+                    json.dump({"version": JOURNAL_VERSION, "parts": self.parts}, f, separators=(",", ":"))
+
+                os.replace(tmpPath, self.path)
+            except OSError as e:
+                warning(f"Failed to write job journal {self.path}: {e}")
+                return
+
+            self.dirty = False
+            self.lastSave = time.monotonic()
+
+    def remove(self):
+        with self.lock:
+            self.parts = {}
+            self.dirty = False
+
+            if os.path.exists(self.path):
+                os.remove(self.path)
@@ -0,0 +1,126 @@
+import os
+import json
+import hashlib
+
+from logging import info, warning, debug, error
+
+from .elibz_writer import ElibzWriter
+
+DEFAULT_SHARD_COUNT = 16
+INDEX_VERSION = 1
+
+
+def shardNumber(uuid, shardCount):
+    return int(hashlib.md5(uuid.encode("utf-8")).hexdigest(), 16) % shardCount
+
+
+class ShardedLibrary:
+    """Stores parts across several .elibz shards in the library directory.
+
+    Devices are assigned to shards by a hash of their UUID. Each shard is a
+    complete EasyEDA library, containing the symbols and footprints of its
+    devices, and is registered as a separate KiCad library. The index file
+    <name>.index.json maps device UUIDs and part codes to shards.
+    """
+
+    def __init__(self, target_path, target_name, shard_count=DEFAULT_SHARD_COUNT):
+        self.target_path = target_path
+        self.target_name = target_name
+        self.index_path = os.path.join(target_path, f"{target_name}.index.json")
+        self.index = self.loadIndex(shard_count)
+
+    def loadIndex(self, shard_count):
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    index = json.load(f)
+
+                if index.get("version") == INDEX_VERSION:
+                    return index
+
+                warning(f"Unsupported library index version in {self.index_path}, rebuilding")
+            except Exception as e:
+                warning(f"Failed to read library index {self.index_path}, rebuilding: {e}")
+
+        return {
+            "version": INDEX_VERSION,
+            "shard_count": shard_count,
+            "devices": {},
+            "codes": {}
+        }
+
+    def saveIndex(self):
+        tmpPath = self.index_path + ".tmp"
+
+        with open(tmpPath, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, separators=(",", ":"))
+
+        os.replace(tmpPath, self.index_path)
+
+    def shardName(self, number):
+        return f"{self.target_name}_{number:02d}"
+
+    def shardPath(self, shard):
+        return os.path.join(self.target_path, f"{shard}.elibz")
+
+    def shardNames(self):
+        """Returns names of all shards that contain parts"""
+        return sorted(set(self.index["devices"].values()))
+
+    def shardForDevice(self, dev_uuid):
+        shard = self.index["devices"].get(dev_uuid)
+
+        if not shard:
+            shard = self.shardName(shardNumber(dev_uuid, self.index["shard_count"]))
+
+        return shard
+
+    def readDevices(self, uuids):
+        """Returns the library entries of devices, reading only the shards that contain them"""
+        devices = {}
+        shards = {self.index["devices"][uuid] for uuid in uuids if uuid in self.index["devices"]}
+
+        for shard in shards:
+            shardDevices = ElibzWriter(self.shardPath(shard)).readDeviceFile()["devices"]
+            devices.update({uuid: device for uuid, device in shardDevices.items() if uuid in uuids})
+
+        return devices
+
+    def write(self, libDeviceFile, symbolDataStr, footprintDataStr):
+        """Writes devices to their shards. Returns names of the shards that were written."""
+        shards = {}
+
+        for dev_uuid, device in libDeviceFile["devices"].items():
+            shard = self.shardForDevice(dev_uuid)
+            part = shards.setdefault(shard, ({"devices": {}, "symbols": {}, "footprints": {}}, {}, {}))
+            shardDeviceFile, shardSymbols, shardFootprints = part
+
+            shardDeviceFile["devices"][dev_uuid] = device
+
+            # Symbols and footprints are stored in the shard of each device using them
+            sym_uuid = device["attributes"].get("Symbol")
+            if sym_uuid in libDeviceFile["symbols"]:
+                shardDeviceFile["symbols"][sym_uuid] = libDeviceFile["symbols"][sym_uuid]
+
+                if sym_uuid in symbolDataStr:
+                    shardSymbols[sym_uuid] = symbolDataStr[sym_uuid]
+
+            fp_uuid = device["attributes"].get("Footprint")
+            if fp_uuid in libDeviceFile["footprints"]:
+                shardDeviceFile["footprints"][fp_uuid] = libDeviceFile["footprints"][fp_uuid]
+
+                if fp_uuid in footprintDataStr:
+                    shardFootprints[fp_uuid] = footprintDataStr[fp_uuid]
+
+        for shard, (shardDeviceFile, shardSymbols, shardFootprints) in shards.items():
+            debug(f"Writing {len(shardDeviceFile['devices'])} devices to shard {shard}")
+            ElibzWriter(self.shardPath(shard)).write(shardDeviceFile, shardSymbols, shardFootprints)
+
+            for dev_uuid, device in shardDeviceFile["devices"].items():
+                self.index["devices"][dev_uuid] = shard
+
+                if device.get("product_code"):
+                    self.index["codes"][device["product_code"]] = dev_uuid
+
+        self.saveIndex()
+        return sorted(shards.keys())
@@ -0,0 +1,158 @@
+import time
+import threading
+
+from contextlib import contextmanager
+
+from logging import info, warning, debug, error
+
+# Minimum seconds between progress callbacks, and between progress log lines
+PROGRESS_INTERVAL = 0.1
+STATUS_LOG_INTERVAL = 5.0
+
+
+def formatDuration(seconds):
+    seconds = int(seconds)
+
+    if seconds >= 3600:
+        return "%dh%02dm" % (seconds // 3600, seconds % 3600 // 60)
+
+    return "%dm%02ds" % (seconds // 60, seconds % 60)
+
+
+class ModelMetrics:
+    """Thread-safe counters of a 3D model download run.
+
+    Download threads report finished models with complete(). Progress callbacks
+    are coalesced to one per PROGRESS_INTERVAL, plus one when the last model is
+    done, so a large import doesn't flood the GUI event queue.
+    """
+
+    def __init__(self, progress=None, total=0):
+        self.progress = progress
+        self.total = total
+        self.done = 0
+        self.bytes = 0
+        self.counters = {"existing": 0, "downloaded": 0, "store": 0, "failed": 0}
+        self.lock = threading.Lock()
+        self.start = time.monotonic()
+        self.lastProgress = 0.0
+        self.lastStatusLog = self.start
+
+    def addTotal(self, count=1):
+        with self.lock:
+            self.total += count
+
+    def count(self, name, bytes=0):
+        with self.lock:
+            self.counters[name] += 1
+            self.bytes += bytes
+
+    def get(self, name):
+        with self.lock:
+            return self.counters[name]
+
+    def complete(self):
+        """Marks one model as done, and reports progress if it is due"""
+        now = time.monotonic()
+
+        with self.lock:
+            self.done += 1
+            done, total = self.done, self.total
+
+            report = done >= total or now - self.lastProgress >= PROGRESS_INTERVAL
+            if report:
+                self.lastProgress = now
+
+            logStatus = done < total and now - self.lastStatusLog >= STATUS_LOG_INTERVAL
+            if logStatus:
+                self.lastStatusLog = now
+
+        if report and self.progress:
+            self.progress(done, total)
+
+        if logStatus:
+            info(self.status())
+
+    def elapsed(self):
+        return time.monotonic() - self.start
+
+    def rates(self):
+        """Returns (models/s, MB/s) since the start of the run"""
+        elapsed = max(self.elapsed(), 1e-6)
+
+        with self.lock:
+            return self.done / elapsed, self.bytes / elapsed / (1024 * 1024)
+
+    def eta(self):
+        """Returns the estimated seconds until all models are done, or None"""
+        modelRate, _ = self.rates()
+
+        with self.lock:
+            remaining = self.total - self.done
+
+        if not modelRate:
+            return None
+
+        return remaining / modelRate
+
+    def status(self):
+        modelRate, mbRate = self.rates()
+        eta = self.eta()
+
+        with self.lock:
+            done, total = self.done, self.total
+
+        text = "3D models: %d/%d, %.1f models/s, %.2f MB/s" % (done, total, modelRate, mbRate)
+
+        if eta is not None and done < total:
+            text += ", ETA %s" % formatDuration(eta)
+
+        return text
+
+
+class StageTimers:
+    """Thread-safe totals of calls, time and bytes per stage of a download run.
+
+    Stages run concurrently, so their times are summed over threads and can
+    add up to more than the run's wall time.
+    """
+
+    def __init__(self):
+        self.stages = {} # Stage name to [calls, seconds, bytes], in order of first use
+        self.lock = threading.Lock()
+        self.start = time.perf_counter()
+
+    def add(self, stage, seconds, bytes=0):
+        with self.lock:
+            totals = self.stages.setdefault(stage, [0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] += bytes
+
+    def addBytes(self, stage, bytes):
+        with self.lock:
+            self.stages.setdefault(stage, [0, 0.0, 0])[2] += bytes
+
+    @contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def logSummary(self):
+        with self.lock:
+            stages = {stage: list(totals) for stage, totals in self.stages.items()}
+
+        info( "" )
+        info( "Stage timings (summed over threads), wall time %.2f s:" % (time.perf_counter() - self.start) )
+
+        for stage, (calls, seconds, bytes) in stages.items():
+            line = "  %-14s %6d calls %9.2f s %9.1f ms avg" % (stage, calls, seconds, seconds * 1000 / calls if calls else 0)
+
+            if bytes:
+                line += " %9.2f MB" % (bytes / (1024 * 1024))
+
+            info( line )
@@ -0,0 +1,71 @@
+import os
+import shutil
+import threading
+
+from logging import info, warning, debug, error
+
+from .http_cache import DiskLRU, getUserCacheDir
+
+DEFAULT_MODEL_STORE_SIZE = 2 * 1024 * 1024 * 1024
+
+
+def modelKey(directUuid, transform):
+    return f"{directUuid}|{transform}"
+
+
+# Hardlink src to dst, or copy it if hardlinks are not supported.
+# Symlinks are not used, as store entries can be evicted at any time.
+def linkOrCopy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+class ModelStore(DiskLRU):
+    """Per-user store of converted STEP models, shared between projects.
+
+    Models are keyed by their direct UUID and the transform applied during
+    conversion. Projects get a hardlink (or a copy) of the stored file.
+    """
+
+    def __init__(self, root=None, max_size=DEFAULT_MODEL_STORE_SIZE):
+        super().__init__(root or getUserCacheDir("models"), max_size)
+
+    def fetch(self, key, targetPath):
+        """Places the stored model at targetPath. Returns False if the model is not stored."""
+        storePath = self.entryPath(key, ".step")
+
+        if not os.path.isfile(storePath):
+            return False
+
+        os.makedirs(os.path.dirname(targetPath), exist_ok=True)
+
+        tmpPath = f"{targetPath}.{threading.get_ident()}.tmp"
+        try:
+            linkOrCopy(storePath, tmpPath)
+            os.replace(tmpPath, targetPath)
+        except OSError as e:
+            debug(f"Failed to get model {key} from the store: {e}")
+
+            if os.path.exists(tmpPath):
+                os.remove(tmpPath)
+            return False
+
+        self.touch(storePath)
+        return True
+
+    def add(self, key, sourcePath):
+        """Adds a converted model to the store"""
+        storePath = self.entryPath(key, ".step")
+
+        try:
+            os.makedirs(os.path.dirname(storePath), exist_ok=True)
+
+            tmpPath = f"{storePath}.{os.getpid()}.{threading.get_ident()}.tmp"
+            linkOrCopy(sourcePath, tmpPath)
+            os.replace(tmpPath, storePath)
+
+            self.added(os.path.getsize(storePath))
+        except OSError as e:
+            warning(f"Failed to add model {os.path.basename(sourcePath)} to the store: {e}")
@@ -0,0 +1,107 @@
+import io
+import os
+import sys
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+
+from logging import info, warning, debug, error
+
+from .http_cache import getUserCacheDir
+
+# Set to 1 to profile download runs
+PROFILE_ENV = "JLC_KICAD_PROFILE"
+
+PROFILE_TOP_FUNCTIONS = 25
+PROFILE_TOP_ALLOCATIONS = 10
+
+
+def profilingRequested():
+    return os.getenv(PROFILE_ENV, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+class RunProfiler:
+    """Captures a cProfile profile and tracemalloc allocation statistics of a download run.
+
+    Download stages run in worker threads. Before Python 3.12, a profiler only
+    sees its own thread, and can only be disabled from it. So only worker threads
+    whose name starts with thread_prefix, which end with the run, get their own
+    profiler, and the results are merged. Other threads started during the run,
+    like the dialog's search threads, are not profiled.
+    """
+
+    def __init__(self, output_dir=None, thread_prefix=None):
+        self.output_dir = output_dir or getUserCacheDir("profiles")
+        self.thread_prefix = thread_prefix
+        self.profiles = []
+        self.lock = threading.Lock()
+
+    def start(self):
+        self.mainProfile = cProfile.Profile()
+
+        if sys.version_info < (3, 12):
+            threading.setprofile(self.startThreadProfile)
+
+        tracemalloc.start()
+        self.mainProfile.enable()
+
+    # Installed as the profile function of new threads; the first call replaces it with a profiler,
+    # or removes it in threads that are not profiled
+    def startThreadProfile(self, frame, event, arg):
+        if not self.thread_prefix or not threading.current_thread().name.startswith(self.thread_prefix):
+            sys.setprofile(None)
+            return
+
+        profile = cProfile.Profile()
+
+        with self.lock:
+            self.profiles.append(profile)
+
+        profile.enable()
+
+    def stop(self):
+        """Stops profiling and logs the results. Returns the path of the saved profile, or None."""
+        self.mainProfile.disable()
+        threading.setprofile(None)
+
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        stats = pstats.Stats(self.mainProfile)
+
+        with self.lock:
+            for profile in self.profiles:
+                try:
+                    stats.add(profile)
+                except Exception as e:
+                    debug(f"Cannot add thread profile: {e}")
+
+        path = os.path.join(self.output_dir, time.strftime("download-%Y%m%d-%H%M%S.pstats"))
+
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            stats.dump_stats(path)
+        except OSError as e:
+            warning(f"Cannot save profile: {e}")
+            path = None
+
+        text = io.StringIO()
+        stats.stream = text
+        stats.sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+
+        info( "" )
+        info( "Profile (top %d functions by cumulative time):" % PROFILE_TOP_FUNCTIONS )
+        info( text.getvalue() )
+
+        info( "Memory: peak %.1f MB traced, %.1f MB at the end of the run" % (peak / (1024 * 1024), current / (1024 * 1024)) )
+
+        for stat in snapshot.statistics("lineno")[:PROFILE_TOP_ALLOCATIONS]:
+            info( "  %s" % stat )
+
+        if path:
+            info( "Profile saved to %s" % path )
+
+        return path
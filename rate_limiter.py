@@ -0,0 +1,191 @@
+import time
+import random
+import threading
+import email.utils
+
+import requests
+import requests.adapters
+
+from logging import info, warning, debug, error
+
+# Concurrency limits per host: initial, minimum and maximum number of requests in flight
+DEFAULT_HOST_LIMITS = {
+    "pro.easyeda.com": (8, 1, 32),
+    "modules.easyeda.com": (8, 1, 16),
+    "*": (8, 1, 16)
+}
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_RETRIES = 5
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30
+
+
+class AdaptiveLimiter:
+    """Limits concurrent requests to a host, adjusting the limit with AIMD.
+
+    Every successful response increases the limit by 1/limit (about one
+    request per round trip), every throttled or failed response halves it.
+    A Retry-After response pauses all requests to the host.
+    """
+
+    def __init__(self, initial, minimum, maximum):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.active = 0
+        self.pausedUntil = 0.0
+        self.cond = threading.Condition()
+
+    def acquire(self):
+        with self.cond:
+            while True:
+                wait = self.pausedUntil - time.monotonic()
+
+                if wait <= 0 and self.active < int(self.limit):
+                    break
+
+                self.cond.wait(wait if wait > 0 else None)
+
+            self.active += 1
+
+    def release(self, congested):
+        with self.cond:
+            self.active -= 1
+
+            if congested:
+                self.limit = max(self.minimum, self.limit / 2)
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+            self.cond.notify_all()
+
+    # Give back a slot without adjusting the limit, for requests that ended without a response
+    def cancel(self):
+        with self.cond:
+            self.active -= 1
+            self.cond.notify_all()
+
+    def pause(self, seconds):
+        with self.cond:
+            self.pausedUntil = max(self.pausedUntil, time.monotonic() + seconds)
+
+
+def backoffDelay(attempt):
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def retryAfterDelay(resp):
+    """Returns the Retry-After delay of a response in seconds, or None"""
+    value = resp.headers.get("Retry-After")
+
+    if not value:
+        return None
+
+    if value.strip().isdigit():
+        return min(BACKOFF_MAX, int(value))
+
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+        return min(BACKOFF_MAX, max(0, date.timestamp() - time.time()))
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveAdapter(requests.adapters.HTTPAdapter):
+    """HTTPAdapter that limits requests with an AdaptiveLimiter, and retries
+    throttled (429), failed (5xx) and dropped requests with backoff."""
+
+    def __init__(self, limiter: AdaptiveLimiter, retries=MAX_RETRIES, **kwargs):
+        super().__init__(**kwargs)
+        self.limiter = limiter
+        self.retries = retries
+
+    def send(self, request, **kwargs):
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire()
+
+            try:
+                resp = super().send(request, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.limiter.release(congested=True)
+
+                if attempt == self.retries:
+                    raise
+
+                delay = backoffDelay(attempt)
+                debug(f"Request to {request.url} failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            except BaseException:
+                # Invalid requests, and KeyboardInterrupt raised by interrupt_thread into a search thread
+                self.limiter.cancel()
+                raise
+
+            if resp.status_code not in RETRY_STATUSES or attempt == self.retries:
+                congested = resp.status_code in RETRY_STATUSES
+
+                if kwargs.get("stream"):
+                    self.releaseOnClose(resp, congested)
+                else:
+                    self.limiter.release(congested=congested)
+
+                return resp
+
+            self.limiter.release(congested=True)
+
+            delay = retryAfterDelay(resp)
+            if delay is not None:
+                self.limiter.pause(delay)
+            else:
+                delay = backoffDelay(attempt)
+
+            debug(f"Request to {request.url} returned {resp.status_code}, retrying in {delay:.1f}s")
+            resp.close()
+            time.sleep(delay)
+
+    # The body of a streamed response is read after send() returns, so its slot is held
+    # until the connection is released after the body is read, or the response is closed
+    def releaseOnClose(self, resp, congested):
+        lock = threading.Lock()
+        released = False
+
+        def release():
+            nonlocal released
+
+            with lock:
+                if released:
+                    return
+                released = True
+
+            self.limiter.release(congested=congested)
+
+        close = resp.close
+
+        def closeResponse():
+            try:
+                close()
+            finally:
+                release()
+
+        resp.close = closeResponse
+
+        releaseConn = getattr(resp.raw, "release_conn", None)
+
+        if releaseConn is not None:
+            def releaseConnection():
+                try:
+                    releaseConn()
+                finally:
+                    release()
+
+            resp.raw.release_conn = releaseConnection
+
+
+def createAdapter(host, host_limits=None, **kwargs):
+    limits = dict(DEFAULT_HOST_LIMITS)
+    limits.update(host_limits or {})
+
+    initial, minimum, maximum = limits.get(host, limits["*"])
+    return AdaptiveAdapter(AdaptiveLimiter(initial, minimum, maximum), pool_maxsize=max(maximum, 10), **kwargs)
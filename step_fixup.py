@@ -0,0 +1,122 @@
+import os
+import sys
+import time
+import logging
+import traceback
+
+# This module may be loaded in worker processes, so it must not depend on
+# the plugin UI, and it reports log records back to the caller instead of logging.
+
+
+def probePcbnew():
+    """Checks that pcbnew can be imported in the current (worker) process"""
+    import pcbnew
+    return hasattr(pcbnew, "UTILS_STEP_MODEL")
+
+
+def findPythonExecutable():
+    """Returns the Python interpreter to start worker processes with, or None.
+
+    Inside KiCad, sys.executable can point to the KiCad binary itself.
+    """
+    candidates = [sys.executable]
+
+    if sys.platform == "win32":
+        candidates += [os.path.join(sys.exec_prefix, "python.exe"),
+                       os.path.join(os.path.dirname(sys.executable), "python.exe")]
+    else:
+        candidates += [os.path.join(sys.exec_prefix, "bin", f"python{sys.version_info.major}.{sys.version_info.minor}"),
+                       os.path.join(sys.exec_prefix, "bin", "python3")]
+
+    for path in candidates:
+        if path and os.path.basename(path).lower().startswith("python") and os.path.isfile(path):
+            return path
+
+    return None
+
+
+def timedFixupStepModel(jfilePath, kfilePath, transform):
+    """Runs fixupStepModel. Returns a tuple (success, records, seconds spent converting)."""
+    start = time.perf_counter()
+    success, records = fixupStepModel(jfilePath, kfilePath, transform)
+    return success, records, time.perf_counter() - start
+
+
+def fixupStepModel(jfilePath, kfilePath, transform):
+    """Scales the downloaded model in jfilePath to fit transform, centers it and saves it to kfilePath.
+
+    Returns a tuple (success, records), where records is a list of (level, message) to log.
+    """
+    from pcbnew import UTILS_STEP_MODEL, UTILS_BOX3D, VECTOR3D
+
+    records = []
+
+    def log(level, msg):
+        records.append((level, msg))
+
+    file_name = os.path.splitext( os.path.basename( kfilePath ) ) [0]
+
+    log( logging.DEBUG, "Loading STEP model %s" % (file_name) )
+    model: UTILS_STEP_MODEL = UTILS_STEP_MODEL.LoadSTEP(jfilePath)
+
+    if not model:
+        log( logging.ERROR, "Error loading model '%s'" % (file_name) )
+        return False, records
+
+    log( logging.DEBUG, "Converting STEP model '%s'" % (file_name) )
+    bbox: UTILS_BOX3D = model.GetBoundingBox()
+
+    try:
+        if transform:
+            # Convert mils to mm
+            fitXmm = transform[0] / 39.37
+            fitYmm = transform[1] / 39.37
+
+            bsize: VECTOR3D = bbox.GetSize()
+            scaleFactorX = fitXmm / bsize.x;
+            scaleFactorY = fitYmm / bsize.y;
+            scaleFactor = ( scaleFactorX + scaleFactorY ) / 2
+
+            log( logging.DEBUG, "Dimensions %f %f factors %f %f avg %f model '%s'" %
+                (fitXmm, fitYmm, scaleFactorX, scaleFactorY, scaleFactor, file_name) )
+
+            if abs( scaleFactorX - scaleFactorY ) > 0.1:
+                log( logging.WARNING, "Scale factors do not match: X %.3f; Y %.3f for model '%s'." %
+                    (scaleFactorX, scaleFactorY, file_name) )
+                log( logging.WARNING, "**** The model '%s' might be misoriented! ****" % (file_name) )
+            elif abs( scaleFactor - 1.0 ) > 0.01:
+                log( logging.WARNING, "Scaling '%s' by %f" % (file_name, scaleFactor) )
+                model.Scale( scaleFactor );
+            else:
+                log( logging.DEBUG, "No scaling for %s" % (file_name) )
+
+    except Exception as e:
+        log( logging.DEBUG, traceback.format_exc() )
+        log( logging.ERROR, "Error scaling model '%s': %s" % (file_name, str(e)) )
+        return False, records
+
+    newbbox          = model.GetBoundingBox()
+    center: VECTOR3D = newbbox.GetCenter()
+
+    model.Translate( -center.x, -center.y, -newbbox.Min().z )
+
+    log( logging.DEBUG, "Saving STEP model %s" % (file_name) )
+
+    # Save to a temporary file first, so an interrupted save never leaves a partial model at kfilePath
+    tmpPath = os.path.splitext( kfilePath )[0] + ".part.step"
+
+    if model.SaveSTEP( tmpPath ) is False or not os.path.isfile( tmpPath ):
+        log( logging.ERROR, "Error saving model '%s'" % (file_name) )
+        return False, records
+
+    os.replace( tmpPath, kfilePath )
+
+    # Delete the temporary JLC file after successful conversion
+    try:
+        if os.path.exists(jfilePath):
+            os.remove(jfilePath)
+            log( logging.DEBUG, f"Deleted temporary file {jfilePath}" )
+    except Exception as e:
+        log( logging.INFO, f"Failed to delete temporary file {jfilePath}: {str(e)}" )
+
+    return True, records
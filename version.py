@@ -0,0 +1,15 @@
+import os
+
+# Read version file
+__version__ = "0.0.0"
+try:
+    version_file = os.path.join(os.path.dirname(__file__), "VERSION")
+    if os.path.exists(version_file):
+        with open(version_file, "r") as f:
+            version_content = f.read().strip()
+            if version_content:
+                __version__ = version_content
+except Exception:
+    pass
+
+DEFAULT_USER_AGENT = f"jlc-kicad-lib-loader/{__version__}"